@@ -1,5 +1,14 @@
 import csv
+import heapq
+import time
+import fpGrowth
+from PCY import bucketCounter
+from PCY import candidateTrie
+from PCY import hashFamily
+from PCY import instrument
 from PCY import pcy
+from PCY import tidBitmap
+from PCY import transactionStore
 
 
 def loadDataSet():
@@ -65,10 +74,10 @@ def createC1(data_set):
     """
 
     C1 = set()
-    for t in data_set:
+    for t in transactionStore.iterTransactions(data_set):
         for item in t:
             # 生成不可变set，使得可被其它set加入作为元素
-            item_set = frozenset([item])
+            item_set = frozenset([int(item)])
             # 为生成频繁项目集时扫描数据库时以提供issubset()功能
             C1.add(item_set)
     return C1
@@ -77,40 +86,51 @@ def createC1(data_set):
 def isApriori(Ck_item, Lk_sub_1):
     """
     判断是否满足先验条件，即任何非频繁的(k-1)项集都不是频繁k项集的子集
-    :param Ck_item:候选频繁k项集
-    :param Lk_sub_1:频繁k-1项集
+    由同前缀连接而来的候选集，去掉最后两项之一得到的子集就是参与连接的两个频繁集，无需再检查
+    :param Ck_item:候选频繁k项集，排好序的tuple
+    :param Lk_sub_1:频繁k-1项集，排好序的tuple构成的set
     :return:true or false
     """
-    for item in Ck_item:
-        sub_item = Ck_item - frozenset([item])
+    for i in range(len(Ck_item) - 2):
+        sub_item = Ck_item[:i] + Ck_item[i + 1:]
         if sub_item not in Lk_sub_1:
             return False
     return True
 
 
-def createCk(Lk_sub_1, k):
+def createCk(Lk_sub_1, k, prune_stats=None):
     """
     生成候选频繁k项集
+    频繁k-1项集以排好序的tuple表示，按前k-2项分组，只在组内两两连接
     :param Lk_sub_1:频繁k-1项集
     :param k:当前要生成的候选频繁几项集
+    :param prune_stats:传入dict时，写入连接生成的项集个数'joined'与被先验条件剪掉的个数'apriori_pruned'
     :return:候选频繁k项集
     """
 
     Ck = set()
-    len_Lk_sub_1 = len(Lk_sub_1)
-    list_Lk_sub_1 = list(Lk_sub_1)
-    for i in range(len_Lk_sub_1):
-        for j in range(i + 1, len_Lk_sub_1):
-            l1 = list(list_Lk_sub_1[i])
-            l2 = list(list_Lk_sub_1[j])
-            l1.sort()
-            l2.sort()
-            # 判断l1的前k-1-1个元素与l2的前k-1-1个元素对应位是否全部相同
-            # 如果相同，那么两者连接生成k项集，若该集满足先验条件，则加入到候选集中
-            if l1[0:k - 2] == l2[0:k - 2]:
-                Ck_item = list_Lk_sub_1[i] | list_Lk_sub_1[j]
-                if isApriori(Ck_item, Lk_sub_1):
-                    Ck.add(Ck_item)
+    joined = 0
+    sorted_Lk_sub_1 = set(tuple(sorted(item)) for item in Lk_sub_1)
+    # 前k-2项-最后一项list的dict
+    prefix_groups = dict()
+    for items in sorted_Lk_sub_1:
+        prefix = items[0:k - 2]
+        if prefix not in prefix_groups:
+            prefix_groups[prefix] = list()
+        prefix_groups[prefix].append(items[k - 2])
+    for prefix, last_items in prefix_groups.items():
+        last_items.sort()
+        len_last_items = len(last_items)
+        for i in range(len_last_items):
+            for j in range(i + 1, len_last_items):
+                # 前k-2项相同的两个频繁集连接生成k项集，若该集满足先验条件，则加入到候选集中
+                Ck_item = prefix + (last_items[i], last_items[j])
+                joined += 1
+                if isApriori(Ck_item, sorted_Lk_sub_1):
+                    Ck.add(frozenset(Ck_item))
+    if prune_stats is not None:
+        prune_stats['joined'] = joined
+        prune_stats['apriori_pruned'] = joined - len(Ck)
     return Ck
 
 
@@ -125,15 +145,8 @@ def generateLkByCk(data_set, Ck, min_support, support_data):
     """
 
     Lk = set()
-    # 通过dict记录候选频繁k项集的事务支持个数，即出现次数
-    item_count = {}
-    for t in data_set:
-        for Ck_item in Ck:
-            if Ck_item.issubset(t):
-                if Ck_item not in item_count:
-                    item_count[Ck_item] = 1
-                else:
-                    item_count[Ck_item] += 1
+    # 候选集构造成前缀树，每个事务只沿树走一遍，通过dict记录候选频繁k项集的事务支持个数，即出现次数
+    item_count = candidateTrie.countSupport(data_set, Ck)
     data_num = float(len(data_set))
     for item in item_count:
         if (item_count[item] / data_num) >= min_support:
@@ -142,58 +155,203 @@ def generateLkByCk(data_set, Ck, min_support, support_data):
     return Lk
 
 
-def generateL(data_set, max_k, min_support):
+def makeCounter(data_set, engine):
+    """
+    选择支持度计数引擎
+    :param data_set: 数据库事务集
+    :param engine: 'scan'为逐事务扫描，'bitmap'为垂直布局的事务id位图
+    :return: 与generateLkByCk参数相同的计数函数
+    """
+    if engine == 'scan':
+        return generateLkByCk
+    if engine == 'bitmap':
+        index = tidBitmap.TidBitmapIndex(data_set)
+        return lambda data_set, Ck, min_support, support_data: index.generateLkByCk(Ck, min_support, support_data)
+    raise ValueError("unknown engine: %s" % engine)
+
+
+def generateL(data_set, max_k, min_support, engine='scan', level_stats=None, hook=None):
     """
     生成最高项为k的所有频繁项目集L和对应的support记录support_data
     :param data_set:数据库事务集
     :param max_k:求的最高项目集为k项
     :param min_support:最小支持度
+    :param engine:支持度计数引擎，'scan' or 'bitmap'
+    :param level_stats:传入list时，每层追加一个dict，记录候选集与频繁集的个数
+    :param hook:接收统计事件的函数，每层生成候选集与计数后各发送一个事件，见instrument.emit
     :return:
     """
     # 创建一个频繁项目集为key，其支持度为value的dict
     support_data = {}
+    count_Lk = makeCounter(data_set, engine)
+    start = time.time()
     C1 = createC1(data_set)
-    L1 = generateLkByCk(data_set, C1, min_support, support_data)
+    instrument.emit(hook, 'createC1', start, k=1, candidates=len(C1))
+    start = time.time()
+    L1 = count_Lk(data_set, C1, min_support, support_data)
+    instrument.emit(hook, 'count', start, k=1, candidates=len(C1), frequent=len(L1))
+    if level_stats is not None:
+        level_stats.append({'k': 1, 'candidates': len(C1), 'frequent': len(L1)})
     Lk_sub_1 = L1.copy()  # 对L1进行浅copy
     L = []
     L.append(Lk_sub_1)  # 末尾添加指定元素
     for k in range(2, max_k + 1):
-        Ck = createCk(Lk_sub_1, k)
-        Lk = generateLkByCk(data_set, Ck, min_support, support_data)
+        start = time.time()
+        prune_stats = {'k': k}
+        Ck = createCk(Lk_sub_1, k, prune_stats)
+        instrument.emit(hook, 'createCk', start, candidates=len(Ck), **prune_stats)
+        start = time.time()
+        Lk = count_Lk(data_set, Ck, min_support, support_data)
+        instrument.emit(hook, 'count', start, k=k, candidates=len(Ck), frequent=len(Lk))
+        if level_stats is not None:
+            prune_stats['candidates'] = len(Ck)
+            prune_stats['frequent'] = len(Lk)
+            level_stats.append(prune_stats)
         Lk_sub_1 = Lk.copy()
         L.append(Lk_sub_1)
     return L, support_data
 
 
-def generateLUsePcy(data_set, max_k, min_support):
+def generateLUsePcy(data_set, max_k, min_support, engine='scan', buckets_len=30, hash_func=pcy.getHashCode,
+                    memory_budget=None, level_buckets_len=None, level_hash_func=pcy.getItemsetHashCode,
+                    level_stats=None, hook=None):
     """
     2阶频繁集用pcy算法计算，高阶频繁集照常计算
+    指定level_buckets_len时，高阶也使用桶过滤：统计(k-1)项集的同一遍扫描中把k项子集hash到桶中，
+    落在不频繁桶中的候选k项集不再计数，这些层的计数总是扫描数据集
     :param data_set:数据库事务集
     :param max_k:求的最高项目集为k项
     :param min_support:最小支持度
+    :param engine:高阶频繁集的支持度计数引擎，'scan' or 'bitmap'
+    :param buckets_len:桶的数量
+    :param hash_func:hash函数，见hashFamily.createHash
+    :param memory_budget:桶使用的内存预算，例如'512MB'，指定时按预算确定桶的数量
+    :param level_buckets_len:3项集及以上使用的桶的数量，None表示不过滤
+    :param level_hash_func:k项集的hash函数f(排好序的tuple, buckets_len)
+    :param level_stats:传入list时，每层(k>=2)追加一个dict，记录候选集与频繁集的个数，
+                       k>=3时还记录连接生成的项集个数、先验条件与桶各剪掉的候选集个数
+    :param hook:接收统计事件的函数，pcy的每个pass与之后每层的生成候选集、桶过滤、计数各发送一个事件
     :return:
     """
-    buckets_len = 30
-    L1, vector, support_data = pcy.firstPass(data_set, buckets_len, min_support)
-    # 输出vector
-    for _ in range(0, buckets_len):
-        if _ == 0:
-            print("Vector:\t")
-        print(str((vector & (1 << _)) >> _) + '\t', end="")
-    print()
-    L2 = pcy.secondPass(data_set, L1, vector, support_data, buckets_len, min_support)
+    if memory_budget is not None:
+        buckets_len = hashFamily.bucketsForMemory(memory_budget)
+    packed = buckets_len > 64
+    L1, vector, support_data = pcy.firstPass(data_set, buckets_len, min_support, packed, hash_func, hook=hook)
+    # 输出vector，桶太多时只输出frequent桶的个数
+    if packed:
+        print("Vector:\t" + str(bucketCounter.frequentBucketCount(vector)) + "/" + str(buckets_len))
+    else:
+        for _ in range(0, buckets_len):
+            if _ == 0:
+                print("Vector:\t")
+            print(str(int(bucketCounter.isFrequentBucket(vector, _))) + '\t', end="")
+        print()
+    filter_stats = dict()
+    level_counts = None
+    if level_buckets_len is not None and max_k >= 3:
+        # 统计2项集的同时为3项集的桶计数
+        start = time.time()
+        # 与pcy.secondPass相同，有hook时统计每级过滤掉的项目对个数
+        filter_counts = dict() if hook is not None else None
+        C2 = bucketCounter.keysToItemsets(pcy.generateC2Keys(data_set, L1, vector, buckets_len, hash_func,
+                                                             filter_counts))
+        L2, level_counts = countLevelWithBuckets(data_set, C2, min_support, support_data, level_buckets_len,
+                                                 level_hash_func)
+        filter_stats.update(bucketCounter.filterStats(C2, L2, [(vector, buckets_len)]))
+        if hook is not None:
+            instrument.emit(hook, 'pcy_second_pass', start, k=2, candidates=len(C2), frequent=len(L2),
+                            level_buckets_len=level_buckets_len,
+                            level_frequent_buckets=countFrequentBuckets(level_counts, data_set, min_support),
+                            **filter_counts)
+    else:
+        L2 = pcy.secondPass(data_set, L1, vector, support_data, buckets_len, min_support, hash_func, filter_stats,
+                            hook=hook)
+    print("false positive rate:\t" + str(filter_stats['false_positive_rate']))
+    if level_stats is not None:
+        level_stats.append({'k': 2, 'candidates': filter_stats['candidates'], 'frequent': len(L2)})
     Lk_sub_1 = L2.copy()
     L = []
     L.append(L1)
     L.append(L2)
+    count_Lk = makeCounter(data_set, engine)
+    data_num = float(len(data_set))
     for k in range(3, max_k + 1):
-        Ck = createCk(Lk_sub_1, k)
-        Lk = generateLkByCk(data_set, Ck, min_support, support_data)
+        start = time.time()
+        prune_stats = {'k': k}
+        Ck = createCk(Lk_sub_1, k, prune_stats)
+        instrument.emit(hook, 'createCk', start, candidates=len(Ck), **prune_stats)
+        start = time.time()
+        if level_counts is not None:
+            # 丢弃落在不频繁桶中的候选集
+            Ck_filtered = set(item for item in Ck
+                              if (level_counts[level_hash_func(tuple(sorted(item)), level_buckets_len)] /
+                                  data_num) >= min_support)
+            prune_stats['bucket_pruned'] = len(Ck) - len(Ck_filtered)
+            Ck = Ck_filtered
+            instrument.emit(hook, 'bucket_filter', start, k=k, candidates=len(Ck),
+                            bucket_pruned=prune_stats['bucket_pruned'])
+        else:
+            prune_stats['bucket_pruned'] = 0
+        start = time.time()
+        if level_counts is not None and k < max_k:
+            Lk, level_counts = countLevelWithBuckets(data_set, Ck, min_support, support_data, level_buckets_len,
+                                                     level_hash_func)
+            instrument.emit(hook, 'count', start, k=k, candidates=len(Ck), frequent=len(Lk),
+                            level_buckets_len=level_buckets_len,
+                            level_frequent_buckets=countFrequentBuckets(level_counts, data_set, min_support))
+        else:
+            Lk = count_Lk(data_set, Ck, min_support, support_data)
+            instrument.emit(hook, 'count', start, k=k, candidates=len(Ck), frequent=len(Lk))
+        prune_stats['candidates'] = len(Ck)
+        prune_stats['frequent'] = len(Lk)
+        if level_stats is not None:
+            level_stats.append(prune_stats)
         Lk_sub_1 = Lk.copy()
         L.append(Lk_sub_1)
     return L, support_data
 
 
+def countFrequentBuckets(bucket_counts, data_set, min_support):
+    """
+    :return: 桶计数list中frequent的桶的个数
+    """
+    data_num = float(len(data_set))
+    return sum(1 for count in bucket_counts if (count / data_num) >= min_support)
+
+
+def countLevelWithBuckets(data_set, Ck, min_support, support_data, buckets_len, hash_func):
+    """
+    由候选频繁k项集生成频繁k项集，同一遍扫描中为k+1项集的桶计数
+    :param data_set: 数据库事务集
+    :param Ck: 候选频繁k项集
+    :param min_support: 最小支持度
+    :param support_data: 项目集-支持度dict
+    :param buckets_len: k+1项集的桶的数量
+    :param hash_func: k项集的hash函数
+    :return: 频繁k项集, k+1项集的桶计数list
+    """
+    k = len(next(iter(Ck))) if Ck else 0
+    item_count, bucket_counts = candidateTrie.countSupportWithBuckets(data_set, Ck, k + 1, buckets_len, hash_func)
+    Lk = set()
+    data_num = float(len(data_set))
+    for item in item_count:
+        if (item_count[item] / data_num) >= min_support:
+            Lk.add(item)
+            support_data[item] = item_count[item] / data_num
+    return Lk, bucket_counts
+
+
+def generateLUseFpGrowth(data_set, max_k, min_support):
+    """
+    用FP-Growth计算频繁项目集，只扫描两遍数据集，不显式生成候选集
+    :param data_set:数据库事务集
+    :param max_k:求的最高项目集为k项
+    :param min_support:最小支持度
+    :return:
+    """
+    return fpGrowth.generateL(data_set, max_k, min_support)
+
+
 def generateRule(L, support_data, min_confidence):
     """
     产生关联规则
@@ -217,16 +375,77 @@ def generateRule(L, support_data, min_confidence):
     return rule_list
 
 
-if __name__ == "__main__":
+def generateRuleByConsequent(L, support_data, min_confidence, top_n=None, order_by='conf'):
+    """
+    产生关联规则，对每个频繁项集只枚举其自身的子集作为后件(ap-genrules)
+    若X=>Y不满足置信度，则后件为Y的超集的规则也不满足，只用满足置信度的后件连接生成更大的后件
+    :param L:所有的频繁项目集
+    :param support_data:项目集-支持度dict
+    :param min_confidence:最小置信度
+    :param top_n:只返回按order_by排序的前top_n条规则，None表示全部返回
+    :param order_by:'conf' or 'lift'
+    :return:规则list，元素为(前件, 后件, 置信度)
+    """
+    rule_dict = dict()
+    for i in range(1, len(L)):
+        for frequent_set in L[i]:
+            frequent_support = support_data[frequent_set]
+            Hm = set(frozenset([item]) for item in frequent_set)
+            m = 1
+            while Hm and m < len(frequent_set):
+                passed = set()
+                for consequent in Hm:
+                    antecedent = frequent_set - consequent
+                    conf = frequent_support / support_data[antecedent]
+                    if conf >= min_confidence:
+                        passed.add(consequent)
+                        rule_dict[(antecedent, consequent)] = conf
+                m += 1
+                Hm = createCk(passed, m) if m < len(frequent_set) else set()
+    rule_list = [(antecedent, consequent, conf) for (antecedent, consequent), conf in rule_dict.items()]
+    if top_n is None:
+        return rule_list
+    if order_by == 'conf':
+        return heapq.nlargest(top_n, rule_list, key=lambda rule: rule[2])
+    if order_by == 'lift':
+        return heapq.nlargest(top_n, rule_list, key=lambda rule: rule[2] / support_data[rule[1]])
+    raise ValueError("unknown order_by: %s" % order_by)
+
+
+def main(hook=None):
+    """
+    python Apriori.py [--events] [--profile cprofile|tracemalloc]
+    :param hook: 接收统计事件的函数
+    """
     data_set = loadDataSet()
     indexed_data_set, index2data = makeIndex(data_set)
+    # 或者生成CSR布局的事务集，各挖掘函数都可直接使用
+    # indexed_data_set, index2data = transactionStore.makeStore(data_set)
+    # 数据集放不进内存时，用流式事务源代替，每遍扫描重新读文件，第一遍后改读二进制溢写文件
+    # indexed_data_set = transactionStream.TransactionStream('Groceries.csv', spill_path='Groceries.bin')
+    # index2data = indexed_data_set.index2data
     # Groceries.csv 测试参数 4 0.005 0.5
     # 小数据集 测试参数 3 0.2 0.7
     # 未使用pcy
-    # L, support_data = generateL(indexed_data_set, 4, 0.005)
+    # L, support_data = generateL(indexed_data_set, 4, 0.005, hook=hook)
+    # 未使用pcy，使用事务id位图计数
+    # L, support_data = generateL(indexed_data_set, 4, 0.005, engine='bitmap')
+    # 使用FP-Growth
+    # L, support_data = generateLUseFpGrowth(indexed_data_set, 4, 0.005)
     # 使用pcy
-    L, support_data = generateLUsePcy(indexed_data_set, 3, 0.005)
+    L, support_data = generateLUsePcy(indexed_data_set, 3, 0.005, hook=hook)
+    # 使用pcy，按内存预算确定桶数，使用murmur风格的hash
+    # L, support_data = generateLUsePcy(indexed_data_set, 3, 0.005, memory_budget='64MB',
+    #                                   hash_func=hashFamily.createHash('murmur'))
+    # 使用pcy，3项集及以上也用桶过滤，并输出每层剪枝的统计
+    # level_stats = list()
+    # L, support_data = generateLUsePcy(indexed_data_set, 4, 0.005, buckets_len=1 << 12, level_buckets_len=1 << 12,
+    #                                   level_stats=level_stats)
+    # for stats in level_stats:
+    #     print(stats)
     rule_list = generateRule(L, support_data, 0.5)
+    # 频繁项集很多时，只枚举每个频繁项集自身的子集
+    # rule_list = generateRuleByConsequent(L, support_data, 0.5)
     for Lk in L:
         print("=" * 55)
         print("frequent " + str(len(list(Lk)[0])) + "-itemsets\t\tsupport")
@@ -241,3 +460,7 @@ if __name__ == "__main__":
     for Lk in L:
         print("frequent " + str(len(list(Lk)[0])) + "-itemsets " + "tot:\t" + str(len(Lk)))
     print("rules tot:\t" + str(len(rule_list)))
+
+
+if __name__ == "__main__":
+    instrument.runMain(main)
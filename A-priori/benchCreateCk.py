@@ -0,0 +1,77 @@
+import time
+import Apriori
+
+
+def isAprioriPairwise(Ck_item, Lk_sub_1):
+    """
+    原先的先验条件判断，对每个子集重新生成frozenset
+    :param Ck_item:候选频繁k项集
+    :param Lk_sub_1:频繁k-1项集
+    :return:true or false
+    """
+    for item in Ck_item:
+        sub_item = Ck_item - frozenset([item])
+        if sub_item not in Lk_sub_1:
+            return False
+    return True
+
+
+def createCkPairwise(Lk_sub_1, k):
+    """
+    原先的候选集生成方式，频繁k-1项集两两比较前k-2项，作为对照
+    :param Lk_sub_1:频繁k-1项集
+    :param k:当前要生成的候选频繁几项集
+    :return:候选频繁k项集
+    """
+
+    Ck = set()
+    len_Lk_sub_1 = len(Lk_sub_1)
+    list_Lk_sub_1 = list(Lk_sub_1)
+    for i in range(len_Lk_sub_1):
+        for j in range(i + 1, len_Lk_sub_1):
+            l1 = list(list_Lk_sub_1[i])
+            l2 = list(list_Lk_sub_1[j])
+            l1.sort()
+            l2.sort()
+            if l1[0:k - 2] == l2[0:k - 2]:
+                Ck_item = list_Lk_sub_1[i] | list_Lk_sub_1[j]
+                if isAprioriPairwise(Ck_item, Lk_sub_1):
+                    Ck.add(Ck_item)
+    return Ck
+
+
+def timeIt(func, *args):
+    """
+    计时
+    :return: 运行时间(s), 返回值
+    """
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+
+def bench(indexed_data_set, max_k, min_support):
+    """
+    对每一层的频繁k-1项集比较两种连接方式的耗时，并检查生成的候选集相同
+    :param indexed_data_set: 索引化后的数据集
+    :param max_k: 求的最高项目集为k项
+    :param min_support: 最小支持度
+    :return:
+    """
+    L, support_data = Apriori.generateLUseFpGrowth(indexed_data_set, max_k - 1, min_support)
+    for k in range(2, max_k + 1):
+        Lk_sub_1 = L[k - 2]
+        pairwise_time, pairwise_Ck = timeIt(createCkPairwise, Lk_sub_1, k)
+        grouped_time, grouped_Ck = timeIt(Apriori.createCk, Lk_sub_1, k)
+        assert pairwise_Ck == grouped_Ck
+        print("%s\t%d\t%d\t%d\t%.4f\t%.4f\t%.1fx" % (
+            str(min_support), k, len(Lk_sub_1), len(grouped_Ck), pairwise_time, grouped_time,
+            pairwise_time / max(grouped_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    data_set = Apriori.loadDataSet()
+    indexed_data_set, index2data = Apriori.makeIndex(data_set)
+    print("min_support\tk\t|Lk-1|\t|Ck|\tpairwise(s)\tgrouped(s)\tspeedup")
+    for min_support in [0.01, 0.005, 0.002, 0.001]:
+        bench(indexed_data_set, 4, min_support)
@@ -0,0 +1,152 @@
+from PCY import transactionStore
+
+
+class FPNode(object):
+    """
+    FP-tree的结点
+    """
+
+    def __init__(self, item, count, parent):
+        self.item = item
+        self.count = count
+        self.parent = parent
+        self.children = dict()
+        # 指向树中下一个相同项目的结点，构成项目头表的链表
+        self.link = None
+
+
+def insertTransaction(root, header_table, items, count):
+    """
+    将按全局顺序排好的事务插入FP-tree，共享前缀的事务共用路径
+    :param root: 根结点
+    :param header_table: 项目头表，项目-[支持计数, 链表头结点, 链表尾结点]
+    :param items: 过滤并排序后的事务
+    :param count: 该事务的出现次数
+    :return:
+    """
+    node = root
+    for item in items:
+        child = node.children.get(item)
+        if child is None:
+            child = FPNode(item, 0, node)
+            node.children[item] = child
+            entry = header_table[item]
+            if entry[1] is None:
+                entry[1] = child
+            else:
+                entry[2].link = child
+            entry[2] = child
+        child.count += count
+        node = child
+
+
+def createFPTree(pattern_base, is_frequent, order):
+    """
+    由(条件)模式基构造FP-tree，第一遍统计项目计数，第二遍插入过滤后的事务
+    :param pattern_base: 事务集，元素为(项目list, 出现次数)
+    :param is_frequent: 判断支持计数是否满足最小支持度的函数
+    :param order: 项目-全局顺序dict，顺序小的项目离根结点近
+    :return: 根结点, 项目头表
+    """
+    item_count = dict()
+    for items, count in pattern_base:
+        for item in items:
+            item_count[item] = item_count.get(item, 0) + count
+    header_table = dict()
+    for item, count in item_count.items():
+        if is_frequent(count):
+            header_table[item] = [count, None, None]
+    root = FPNode(None, 0, None)
+    for items, count in pattern_base:
+        filtered = [item for item in items if item in header_table]
+        filtered.sort(key=lambda item: order[item])
+        if filtered:
+            insertTransaction(root, header_table, filtered, count)
+    return root, header_table
+
+
+def mineTree(header_table, prefix, is_frequent, order, max_k, freq_count):
+    """
+    递归挖掘FP-tree，对头表中每个项目构造条件FP-tree继续挖掘
+    :param header_table: 项目头表
+    :param prefix: 当前条件项集
+    :param is_frequent: 判断支持计数是否满足最小支持度的函数
+    :param order: 项目-全局顺序dict
+    :param max_k: 求的最高项目集为k项，None表示不限制
+    :param freq_count: 频繁项集-支持计数dict
+    :return:
+    """
+    # 从离根结点最远的项目开始挖掘
+    for item in sorted(header_table, key=lambda item: order[item], reverse=True):
+        entry = header_table[item]
+        new_set = prefix | frozenset([item])
+        freq_count[new_set] = entry[0]
+        if max_k is not None and len(new_set) >= max_k:
+            continue
+        # 沿链表收集条件模式基
+        cond_pattern_base = list()
+        node = entry[1]
+        while node is not None:
+            path = list()
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                path.reverse()
+                cond_pattern_base.append((path, node.count))
+            node = node.link
+        if not cond_pattern_base:
+            continue
+        _, cond_header_table = createFPTree(cond_pattern_base, is_frequent, order)
+        if cond_header_table:
+            mineTree(cond_header_table, new_set, is_frequent, order, max_k, freq_count)
+
+
+def generateL(data_set, max_k, min_support):
+    """
+    用FP-Growth生成最高项为k的所有频繁项目集L和对应的support记录support_data，
+    返回结构与Apriori.generateL相同
+    :param data_set: 数据库事务集
+    :param max_k: 求的最高项目集为k项，None表示不限制
+    :param min_support: 最小支持度
+    :return: L, support_data
+    """
+    data_num = 0
+    item_count = dict()
+    # 第一遍扫描：统计项目计数，确定全局顺序
+    for t in transactionStore.iterTransactions(data_set):
+        data_num += 1
+        for item in set(t):
+            item = int(item)
+            item_count[item] = item_count.get(item, 0) + 1
+    data_num = float(data_num)
+
+    def is_frequent(count):
+        return count > 0 and (count / data_num) >= min_support
+
+    # 计数大的项目离根结点近，计数相同按项目索引排序
+    sorted_items = sorted(item_count, key=lambda item: (-item_count[item], item))
+    order = dict((item, index) for index, item in enumerate(sorted_items))
+    # 第二遍扫描：构造FP-tree
+    root = FPNode(None, 0, None)
+    header_table = dict()
+    for item in sorted_items:
+        if is_frequent(item_count[item]):
+            header_table[item] = [item_count[item], None, None]
+    for t in transactionStore.iterTransactions(data_set):
+        filtered = [item for item in set(int(item) for item in t) if item in header_table]
+        filtered.sort(key=lambda item: order[item])
+        if filtered:
+            insertTransaction(root, header_table, filtered, 1)
+    freq_count = dict()
+    mineTree(header_table, frozenset(), is_frequent, order, max_k, freq_count)
+
+    support_data = dict()
+    if max_k is None:
+        max_k = max([len(item) for item in freq_count] + [1])
+    L = [set() for _ in range(max_k)]
+    for frequent_set, count in freq_count.items():
+        L[len(frequent_set) - 1].add(frequent_set)
+        support_data[frequent_set] = count / data_num
+    return L, support_data
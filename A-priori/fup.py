@@ -0,0 +1,154 @@
+import pickle
+import time
+import Apriori
+from PCY import candidateTrie
+
+
+def encodeDataSet(data_set, data2index):
+    """
+    用状态中的项目-索引dict索引化原始数据集，新出现的项目依次分配新的索引并加入data2index
+    :param data_set: 原始数据集
+    :param data2index: 项目-索引dict，会被修改
+    :return: 索引化后的数据集
+    """
+    index_data_set = list()
+    for t in data_set:
+        tmp_list = list()
+        for item in t:
+            if str(item) not in data2index:
+                data2index[str(item)] = len(data2index)
+            tmp_list.append(data2index[str(item)])
+        index_data_set.append(tmp_list)
+    return index_data_set
+
+
+def createState(data_set, max_k, min_support):
+    """
+    全量计算一次频繁项集，生成增量更新需要的状态
+    :param data_set: 原始数据集，项目的索引记录在状态中，之后的数据用同一套索引
+    :param max_k: 求的最高项目集为k项
+    :param min_support: 最小支持度
+    :return: 状态dict，包括事务个数、频繁项集-事务支持个数dict、项目-索引dict、最小支持度与max_k
+    """
+    data2index = dict()
+    indexed_data_set = encodeDataSet(data_set, data2index)
+    data_num = float(len(indexed_data_set))
+    # 与Apriori.generateL相同的逐层计算，但保存整数计数，避免由支持度反推计数的舍入误差
+    count = dict()
+    Lk_sub_1 = set()
+    for k in range(1, max_k + 1):
+        if k == 1:
+            Ck = Apriori.createC1(indexed_data_set)
+        else:
+            Ck = Apriori.createCk(Lk_sub_1, k)
+        item_count = candidateTrie.countSupport(indexed_data_set, Ck)
+        Lk = set()
+        for item in item_count:
+            if (item_count[item] / data_num) >= min_support:
+                Lk.add(item)
+                count[item] = item_count[item]
+        Lk_sub_1 = Lk
+    return {'data_num': len(indexed_data_set), 'count': count, 'data2index': data2index,
+            'min_support': min_support, 'max_k': max_k}
+
+
+def stateToL(state):
+    """
+    由状态恢复频繁项目集L与support_data，结构与Apriori.generateL相同
+    :param state: 状态dict
+    :return: L, support_data
+    """
+    data_num = float(state['data_num'])
+    L = [set() for _ in range(state['max_k'])]
+    support_data = dict()
+    for item, count in state['count'].items():
+        L[len(item) - 1].add(item)
+        support_data[item] = count / data_num
+    return L, support_data
+
+
+def updateState(state, old_data_set, new_data_set):
+    """
+    FUP增量更新：原频繁项集只在新增数据上计数；
+    原来不频繁的候选集必须在新增数据上频繁才可能变为频繁，只对这部分候选集重新扫描原数据
+    :param state: 上次的状态dict
+    :param old_data_set: 原始的原数据集，只在需要重新扫描时用状态中的索引化
+    :param new_data_set: 原始的新增数据集，新出现的项目加入状态的项目-索引dict
+    :return: 新的状态dict
+    """
+    data2index = dict(state['data2index'])
+    new_data_set = encodeDataSet(new_data_set, data2index)
+    indexed_old_data_set = None
+    min_support = state['min_support']
+    max_k = state['max_k']
+    old_count = state['count']
+    old_num = state['data_num']
+    inc_num = len(new_data_set)
+    if inc_num == 0:
+        return state
+    data_num = float(old_num + inc_num)
+    count = dict()
+    Lk_sub_1 = set()
+    for k in range(1, max_k + 1):
+        if k == 1:
+            Ck = set(item for item in old_count if len(item) == 1)
+            Ck.update(Apriori.createC1(new_data_set))
+        else:
+            Ck = Apriori.createCk(Lk_sub_1, k)
+        inc_count = candidateTrie.countSupport(new_data_set, Ck)
+        Lk = set()
+        rescan = set()
+        for item in Ck:
+            if item in old_count:
+                total = old_count[item] + inc_count.get(item, 0)
+                if (total / data_num) >= min_support:
+                    Lk.add(item)
+                    count[item] = total
+            elif (inc_count.get(item, 0) / float(inc_num)) >= min_support:
+                rescan.add(item)
+        if rescan:
+            if indexed_old_data_set is None:
+                indexed_old_data_set = encodeDataSet(old_data_set, data2index)
+            rescan_count = candidateTrie.countSupport(indexed_old_data_set, rescan)
+            for item in rescan:
+                total = rescan_count.get(item, 0) + inc_count.get(item, 0)
+                if (total / data_num) >= min_support:
+                    Lk.add(item)
+                    count[item] = total
+        Lk_sub_1 = Lk
+    return {'data_num': old_num + inc_num, 'count': count, 'data2index': data2index,
+            'min_support': min_support, 'max_k': max_k}
+
+
+def saveState(state, path):
+    """
+    将状态保存到磁盘
+    :param state: 状态dict
+    :param path: 文件路径
+    :return:
+    """
+    with open(path, 'wb') as f:
+        pickle.dump(state, f)
+
+
+def loadState(path):
+    """
+    从磁盘读取状态
+    :param path: 文件路径
+    :return: 状态dict
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    data_set = Apriori.loadDataSet()
+    old_data_set = data_set[:8000]
+    new_data_set = data_set[8000:]
+    saveState(createState(old_data_set, 4, 0.005), 'fup_state.pkl')
+    start = time.time()
+    state = updateState(loadState('fup_state.pkl'), old_data_set, new_data_set)
+    print("fup:\t" + str(time.time() - start) + "s")
+    L, support_data = stateToL(state)
+    for Lk in L:
+        print("frequent " + str(len(list(Lk)[0])) + "-itemsets " + "tot:\t" + str(len(Lk)))
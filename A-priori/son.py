@@ -0,0 +1,94 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import Apriori
+from PCY import candidateTrie
+
+
+def splitDataSet(data_set, chunk_num):
+    """
+    将数据集按顺序切成chunk_num块
+    :param data_set: 索引化后的数据集(list或TransactionStore)
+    :param chunk_num: 块数
+    :return: 块list
+    """
+    data_num = len(data_set)
+    chunk_num = max(1, min(chunk_num, data_num))
+    chunks = list()
+    for i in range(chunk_num):
+        start = data_num * i // chunk_num
+        end = data_num * (i + 1) // chunk_num
+        chunks.append(data_set[start:end])
+    return chunks
+
+
+def mineChunk(chunk, max_k, min_support, engine):
+    """
+    第一遍：在块内用Apriori求局部频繁项集
+    支持度阈值按比例给出，相当于将计数阈值按块的大小缩放
+    :return: 局部频繁项集set
+    """
+    L, support_data = Apriori.generateL(chunk, max_k, min_support, engine)
+    return set(support_data.keys())
+
+
+def countChunk(chunk, candidates):
+    """
+    第二遍：在块内统计所有候选集的出现次数
+    :param chunk: 数据块
+    :param candidates: 项数-候选集set的dict
+    :return: 候选集-出现次数dict
+    """
+    return candidateTrie.countSupportByLevel(chunk, list(candidates.values()))
+
+
+def generateL(data_set, max_k, min_support, workers=None, chunk_num=None, engine='scan'):
+    """
+    SON算法：多进程分块求局部频繁项集，合并为候选集后再多进程统计全局计数，
+    结果与Apriori.generateL相同
+    :param data_set: 索引化后的数据集
+    :param max_k: 求的最高项目集为k项
+    :param min_support: 最小支持度
+    :param workers: 进程数，默认为cpu个数
+    :param chunk_num: 块数，默认与进程数相同
+    :param engine: 块内的支持度计数引擎，'scan' or 'bitmap'
+    :return: L, support_data
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_num is None:
+        chunk_num = workers
+    chunks = splitDataSet(data_set, chunk_num)
+    data_num = float(len(data_set))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 全局频繁的项集至少在一个块内局部频繁，局部频繁项集的并集即候选集
+        candidates = dict()
+        futures = [executor.submit(mineChunk, chunk, max_k, min_support, engine) for chunk in chunks]
+        for future in futures:
+            for item in future.result():
+                k = len(item)
+                if k not in candidates:
+                    candidates[k] = set()
+                candidates[k].add(item)
+        item_count = dict()
+        futures = [executor.submit(countChunk, chunk, candidates) for chunk in chunks]
+        for future in futures:
+            for item, count in future.result().items():
+                item_count[item] = item_count.get(item, 0) + count
+    support_data = dict()
+    L = [set() for _ in range(max_k)]
+    for item, count in item_count.items():
+        if (count / data_num) >= min_support:
+            L[len(item) - 1].add(item)
+            support_data[item] = count / data_num
+    return L, support_data
+
+
+if __name__ == "__main__":
+    data_set = Apriori.loadDataSet()
+    indexed_data_set, index2data = Apriori.makeIndex(data_set)
+    start = time.time()
+    L, support_data = generateL(indexed_data_set, 4, 0.005)
+    print("son:\t" + str(time.time() - start) + "s")
+    for Lk in L:
+        print("frequent " + str(len(list(Lk)[0])) + "-itemsets " + "tot:\t" + str(len(Lk)))
@@ -0,0 +1,89 @@
+import random
+import time
+import Apriori
+from PCY import candidateTrie
+from PCY import transactionStore
+
+
+def sampleDataSet(data_set, fraction, rng):
+    """
+    随机抽取样本，可按下标访问的数据集直接按下标抽样，流式事务源扫描一遍按概率抽样
+    :param data_set: 索引化后的数据集
+    :param fraction: 抽样比例
+    :param rng: random.Random
+    :return: 样本(list)
+    """
+    if isinstance(data_set, (list, transactionStore.TransactionStore)):
+        data_num = len(data_set)
+        sample_num = max(1, int(round(data_num * fraction)))
+        indexes = sorted(rng.sample(range(data_num), min(sample_num, data_num)))
+        return [list(data_set[i]) for i in indexes]
+    sample = list()
+    for t in transactionStore.iterTransactions(data_set):
+        if rng.random() < fraction:
+            sample.append(list(t))
+    return sample
+
+
+def negativeBorder(L_sample, max_k):
+    """
+    求样本频繁项集的负边界(k>=2)：本身在样本中不频繁，但所有(k-1)项子集都在样本中频繁的项集
+    1项集的负边界即样本中不频繁的项目，在全量扫描时统计所有项目即可覆盖
+    :param L_sample: 样本的频繁项目集
+    :param max_k: 求的最高项目集为k项
+    :return: 负边界list，第k-2个元素为k项集的负边界
+    """
+    border = list()
+    for k in range(2, max_k + 1):
+        Ck = Apriori.createCk(L_sample[k - 2], k)
+        border.append(Ck - L_sample[k - 1])
+    return border
+
+
+def generateL(data_set, max_k, min_support, fraction=0.1, lower_factor=0.6, max_attempts=5, seed=None):
+    """
+    Toivonen算法：在样本上以降低后的支持度求频繁项集，求出负边界，再全量扫描一遍验证
+    若负边界中有项集是全量频繁的，说明样本漏掉了频繁项集，重新抽样；多次失败后退回Apriori.generateL
+    :param data_set: 索引化后的数据集
+    :param max_k: 求的最高项目集为k项
+    :param min_support: 最小支持度
+    :param fraction: 抽样比例
+    :param lower_factor: 样本上的支持度为min_support * lower_factor
+    :param max_attempts: 最多抽样次数
+    :param seed: 随机种子
+    :return: L, support_data
+    """
+    rng = random.Random(seed)
+    for attempt in range(1, max_attempts + 1):
+        sample = sampleDataSet(data_set, fraction, rng)
+        L_sample, _ = Apriori.generateL(sample, max_k, min_support * lower_factor)
+        border = negativeBorder(L_sample, max_k)
+        Ck_list = [L_sample[k - 1] | border[k - 2] for k in range(2, max_k + 1)]
+        # 全量扫描一遍，统计所有项目与候选集
+        item_count = candidateTrie.countSupportByLevel(data_set, Ck_list, count_singletons=True)
+        data_num = float(len(data_set))
+        support_data = dict()
+        L = [set() for _ in range(max_k)]
+        for item, count in item_count.items():
+            if (count / data_num) >= min_support:
+                L[len(item) - 1].add(item)
+                support_data[item] = count / data_num
+        # 样本中不频繁的项目和k>=2的负边界
+        missed = [item for item in L[0] if item not in L_sample[0]]
+        for k in range(2, max_k + 1):
+            missed.extend(item for item in border[k - 2] if item in support_data)
+        if not missed:
+            return L, support_data
+        print("toivonen attempt %d: %d negative border itemsets are frequent, resampling" % (attempt, len(missed)))
+    print("toivonen: falling back to Apriori.generateL")
+    return Apriori.generateL(data_set, max_k, min_support)
+
+
+if __name__ == "__main__":
+    data_set = Apriori.loadDataSet()
+    indexed_data_set, index2data = Apriori.makeIndex(data_set)
+    start = time.time()
+    L, support_data = generateL(indexed_data_set, 4, 0.005, fraction=0.3, lower_factor=0.5, seed=0)
+    print("toivonen:\t" + str(time.time() - start) + "s")
+    for Lk in L:
+        print("frequent " + str(len(list(Lk)[0])) + "-itemsets " + "tot:\t" + str(len(Lk)))
@@ -1,5 +1,17 @@
-import itertools
 import csv
+import os
+import sys
+import time
+
+if __name__ == "__main__":
+    # 与pcy.py相同，支持在PCY目录中直接运行
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PCY import bucketCounter
+from PCY import candidateTrie
+from PCY import instrument
+from PCY import parallelCounter
+from PCY import transactionStore
 
 
 def loadDataSet():
@@ -52,11 +64,12 @@ def resumeDataSet(indexed_data_set, index2data):
 
 
 def getFirstHashCode(a, b, buckets_len):
-    return int((a * b) % buckets_len)
+    # 同时支持int与numpy数组
+    return (a * b) % buckets_len
 
 
 def getSecondHashCode(a, b, buckets_len):
-    return int((a + b) % buckets_len)
+    return (a + b) % buckets_len
 
 
 def createC1(data_set):
@@ -67,42 +80,46 @@ def createC1(data_set):
     """
 
     C1 = set()
-    for t in data_set:
+    for t in transactionStore.iterTransactions(data_set):
         for item in t:
             # 生成不可变set，使得可被其它set加入作为元素
-            item_set = frozenset([item])
+            item_set = frozenset([int(item)])
             # 为生成频繁项目集时扫描数据库时以提供issubset()功能
             C1.add(item_set)
     return C1
 
 
-def generateC2(data_set, L1, first_vector, second_vector, first_buckets_len, second_buckets_len):
+def generateC2Keys(data_set, L1, first_vector, second_vector, first_buckets_len, second_buckets_len,
+                   first_hash_func=getFirstHashCode, second_hash_func=getSecondHashCode, filter_counts=None):
     """
-    生成候选频繁2项集
+    生成候选频繁2项集：频繁1项集表示成以项目索引为下标的bool数组，事务先过滤掉不频繁的项目再枚举项目对，
+    项目对编码成int64(较小者 << 32 | 较大者)
     :param data_set: 索引化后的数据集
     :param L1: 频繁1项集
     :param first_vector: 第一种向量
     :param second_vector: 第二种向量
     :param first_buckets_len: 第一种桶的数量
     :param second_buckets_len: 第二种桶的数量
-    :return: C2
+    :param first_hash_func: 第一个hash函数
+    :param second_hash_func: 第二个hash函数
+    :param filter_counts: 传入dict时，写入被频繁项目与每个bitmap过滤掉的项目对个数
+    :return: 排好序的项目对编码数组
     """
 
-    C2 = set()
-    for t in data_set:
-        for pair in itertools.combinations(t, 2):
-            a = frozenset([pair[0]])
-            b = frozenset([pair[1]])
-            if a not in L1 or b not in L1:
-                continue
-            first_hash_code = getFirstHashCode(pair[0], pair[1], first_buckets_len)
-            if first_vector & (1 << first_hash_code) == 0:
-                continue
-            second_hash_code = getSecondHashCode(pair[0], pair[1], second_buckets_len)
-            if second_vector & (1 << second_hash_code) == 0:
-                continue
-            C2.add(frozenset([pair[0], pair[1]]))
-    return C2
+    filters = [(first_buckets_len, first_hash_func, bucketCounter.unpackVector(first_vector, first_buckets_len)),
+               (second_buckets_len, second_hash_func, bucketCounter.unpackVector(second_vector, second_buckets_len))]
+    return bucketCounter.candidatePairKeys(data_set, bucketCounter.itemMask(L1), filters,
+                                           filter_counts=filter_counts)
+
+
+def generateC2(data_set, L1, first_vector, second_vector, first_buckets_len, second_buckets_len,
+               first_hash_func=getFirstHashCode, second_hash_func=getSecondHashCode):
+    """
+    生成候选频繁2项集
+    :return: C2，frozenset构成的set
+    """
+    return bucketCounter.keysToItemsets(generateC2Keys(data_set, L1, first_vector, second_vector, first_buckets_len,
+                                                       second_buckets_len, first_hash_func, second_hash_func))
 
 
 def generateLkByCk(data_set, Ck, min_support, support_data):
@@ -116,15 +133,8 @@ def generateLkByCk(data_set, Ck, min_support, support_data):
     """
 
     Lk = set()
-    # 通过dict记录候选频繁k项集的事务支持个数
-    item_count = {}
-    for t in data_set:
-        for Ck_item in Ck:
-            if Ck_item.issubset(t):
-                if Ck_item not in item_count:
-                    item_count[Ck_item] = 1
-                else:
-                    item_count[Ck_item] += 1
+    # 候选集构造成前缀树，每个事务只沿树走一遍，通过dict记录候选频繁k项集的事务支持个数
+    item_count = candidateTrie.countSupport(data_set, Ck)
     data_num = float(len(data_set))
     for item in item_count:
         if (item_count[item] / data_num) >= min_support:
@@ -133,31 +143,22 @@ def generateLkByCk(data_set, Ck, min_support, support_data):
     return Lk
 
 
-def generateFirstVector(data_set, buckets_len, min_support):
+def generateFirstVector(data_set, buckets_len, min_support, packed=False, hash_func=getFirstHashCode):
     """
     生成vector，第i位上为1表示对应的bucket是frequent的
+    按块向量化枚举项目对并hash，原地累加到桶计数中
     :param data_set:索引化后的数据集
     :param buckets_len:桶的数量
     :param min_support:support阈值
-    :return:vector (int value)
+    :param packed:True返回packbits后的uint8数组
+    :param hash_func:hash函数
+    :return:vector (int value，或packbits后的数组)
     """
-    buckets = dict()
-    vector = int(0)
-    # 初始化hashtable
-    for i in range(0, buckets_len):
-        buckets[i] = 0
-    for t in data_set:
-        for pair in itertools.combinations(t, 2):
-            hash_code = getFirstHashCode(int(pair[0]), int(pair[1]), buckets_len)
-            buckets[hash_code] += 1
-    data_num = float(len(data_set))
-    for index, val in buckets.items():
-        if (val / data_num) >= min_support:
-            vector |= (1 << index)
-    return vector
+    return bucketCounter.generateVector(data_set, buckets_len, min_support, hash_func, packed)
 
 
-def generateSecondVector(data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support):
+def generateSecondVector(data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support,
+                         first_hash_func=getFirstHashCode, second_hash_func=getSecondHashCode, workers=None):
     """
     生成第二个vector
     :param data_set:索引化后的数据集
@@ -166,48 +167,43 @@ def generateSecondVector(data_set, L1, first_vector, first_buckets_len, second_b
     :param first_buckets_len: 第一种bucket的数量
     :param second_buckets_len: 第二中bucket的数量
     :param min_support: support阈值
+    :param first_hash_func: 第一个hash函数
+    :param second_hash_func: 第二个hash函数
+    :param workers: 大于1时用多进程计数，结果与单进程相同
     :return: vector (type int)
     """
-    buckets = dict()
-    second_vector = int(0)
-    # 初始化hashtable
-    for i in range(0, second_buckets_len):
-        buckets[i] = 0
-    for t in data_set:
-        for pair in itertools.combinations(t, 2):
-            a = frozenset([pair[0]])
-            b = frozenset([pair[1]])
-            if a not in L1 or b not in L1:
-                continue
-            first_hash_code = getFirstHashCode(int(pair[0]), int(pair[1]), first_buckets_len)
-            if first_vector & (1 << first_hash_code) == 0:
-                continue
-            second_hash_code = getSecondHashCode(int(pair[0]), int(pair[1]), second_buckets_len)
-            buckets[second_hash_code] += 1
-    data_num = float(len(data_set))
-    for index, val in buckets.items():
-        if (val / data_num) >= min_support:
-            second_vector |= (1 << index)
-    return second_vector
+    item_mask = bucketCounter.itemMask(L1)
+    filters = [(first_buckets_len, first_hash_func, bucketCounter.unpackVector(first_vector, first_buckets_len))]
+    counts = parallelCounter.countPairBuckets(data_set, [(second_buckets_len, second_hash_func)], workers,
+                                              item_mask, filters)[0]
+    return bucketCounter.countsToVector(counts, len(data_set), min_support)
 
 
-def firstPass(data_set, first_buckets_len, min_support):
+def firstPass(data_set, first_buckets_len, min_support, first_hash_func=getFirstHashCode, workers=None, hook=None):
     """
     first pass，返回频繁1项集L1, first vector, support_data
     :param data_set: 索引化后的数据集
     :param first_buckets_len: 第一种桶的数量
     :param min_support: support阈值
+    :param first_hash_func: 第一个hash函数
+    :param workers: 大于1时用多进程计数
+    :param hook: 接收统计事件的函数，见instrument.emit
     :return:L1, first vector, support_data
     """
-    C1 = createC1(data_set)
+    start = time.time()
+    # 只扫描一遍，同时统计项目计数与桶计数
+    item_counts, bucket_counts, data_num = parallelCounter.countFirstPass(data_set, [(first_buckets_len,
+                                                                                      first_hash_func)], workers)
     support_data = dict()
-    # 这里只是把support_data的引用传过去，顺便计算support值
-    L1 = generateLkByCk(data_set, C1, min_support, support_data)
-    first_vector = generateFirstVector(data_set, first_buckets_len, min_support)
+    L1 = bucketCounter.frequentItems(item_counts, data_num, min_support, support_data)
+    first_vector = bucketCounter.countsToVector(bucket_counts[0], data_num, min_support)
+    instrument.emit(hook, 'multistage_first_pass', start, k=1, items=int((item_counts > 0).sum()), frequent=len(L1),
+                    buckets_len=first_buckets_len, frequent_buckets=bucketCounter.frequentBucketCount(first_vector))
     return L1, first_vector, support_data
 
 
-def secondPass(data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support):
+def secondPass(data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support,
+               first_hash_func=getFirstHashCode, second_hash_func=getSecondHashCode, workers=None, hook=None):
     """
     second pass，返回second vector
     :param data_set: 索引化后的数据集
@@ -216,14 +212,23 @@ def secondPass(data_set, L1, first_vector, first_buckets_len, second_buckets_len
     :param first_buckets_len: 第一种桶的数量
     :param second_buckets_len: 第二种桶的数量
     :param min_support: support阈值
+    :param first_hash_func: 第一个hash函数
+    :param second_hash_func: 第二个hash函数
+    :param workers: 大于1时用多进程计数
+    :param hook: 接收统计事件的函数，见instrument.emit
     :return:second vector
     """
-    second_vector = generateSecondVector(data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support)
+    start = time.time()
+    second_vector = generateSecondVector(data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support,
+                                         first_hash_func, second_hash_func, workers)
+    instrument.emit(hook, 'multistage_second_pass', start, buckets_len=second_buckets_len,
+                    frequent_buckets=bucketCounter.frequentBucketCount(second_vector))
     return second_vector
 
 
 def thirdPass(data_set, L1, first_vector, second_vector, support_data, first_buckets_len, second_buckets_len,
-              min_support):
+              min_support, first_hash_func=getFirstHashCode, second_hash_func=getSecondHashCode, filter_stats=None,
+              hook=None):
     """
     third pass，返回频繁2项集L2
     :param data_set: 索引化后的数据集
@@ -234,28 +239,54 @@ def thirdPass(data_set, L1, first_vector, second_vector, support_data, first_buc
     :param first_buckets_len: 第一种桶的数量
     :param second_buckets_len: 第二种桶的数量
     :param min_support: support阈值
+    :param first_hash_func: 第一个hash函数
+    :param second_hash_func: 第二个hash函数
+    :param filter_stats: 传入dict时，写入bucket过滤的统计(frequent桶个数、误报率等)
+    :param hook: 接收统计事件的函数，传入时额外统计每级过滤掉的项目对个数
     :return:L2
     """
-    C2 = generateC2(data_set, L1, first_vector, second_vector, first_buckets_len, second_buckets_len)
-    L2 = generateLkByCk(data_set, C2, min_support, support_data)
+    start = time.time()
+    filter_counts = dict() if hook is not None else None
+    C2_keys = generateC2Keys(data_set, L1, first_vector, second_vector, first_buckets_len, second_buckets_len,
+                             first_hash_func, second_hash_func, filter_counts)
+    counts = bucketCounter.countCandidatePairs(data_set, C2_keys, bucketCounter.itemMask(L1))
+    L2 = bucketCounter.frequentPairs(C2_keys, counts, len(data_set), min_support, support_data)
+    if filter_stats is not None:
+        filter_stats.update(bucketCounter.filterStats(C2_keys, L2, [(first_vector, first_buckets_len),
+                                                                    (second_vector, second_buckets_len)]))
+    if hook is not None:
+        instrument.emit(hook, 'multistage_third_pass', start, k=2, candidates=len(C2_keys), frequent=len(L2),
+                        **filter_counts)
     return L2
 
 
-def test():
+def test(hook=None):
     first_buckets_len = 20
     second_buckets_len = 20
+    # 按内存预算确定桶数，每个pass只有一个hash表
+    # first_buckets_len = second_buckets_len = hashFamily.bucketsForMemory('512MB')
+    first_hash_func = getFirstHashCode
+    second_hash_func = getSecondHashCode
+    # first_hash_func = hashFamily.createHash('murmur', seed=1)
+    # second_hash_func = hashFamily.createHash('murmur', seed=2)
     min_support = 0.005
     data_set = loadDataSet()
     indexed_data_set, index2data = makeIndex(data_set)
-    L1, first_vector, support_data = firstPass(indexed_data_set, first_buckets_len, min_support)
-    second_vector = secondPass(indexed_data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support)
+    L1, first_vector, support_data = firstPass(indexed_data_set, first_buckets_len, min_support, first_hash_func,
+                                               hook=hook)
+    second_vector = secondPass(indexed_data_set, L1, first_vector, first_buckets_len, second_buckets_len, min_support,
+                               first_hash_func, second_hash_func, hook=hook)
+    filter_stats = dict()
     L2 = thirdPass(indexed_data_set, L1, first_vector, second_vector,
-                   support_data, first_buckets_len, second_buckets_len, min_support)
+                   support_data, first_buckets_len, second_buckets_len, min_support,
+                   first_hash_func, second_hash_func, filter_stats, hook)
     L2_data = resumeDataSet(list(L2), index2data)
     for term in L2_data:
         print(term)
     print(str(len(L2_data)))
+    print("frequent buckets:\t" + str(filter_stats['frequent_buckets']))
+    print("false positive rate:\t" + str(filter_stats['false_positive_rate']))
 
 
 if __name__ == "__main__":
-    test()
+    instrument.runMain(test)
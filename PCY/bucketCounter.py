@@ -0,0 +1,436 @@
+import numpy as np
+from PCY import transactionStore
+
+
+def iterCsrChunks(data_set, chunk_size=10000):
+    """
+    按块返回CSR布局的事务(offsets, items)，offsets从0开始
+    :param data_set: 索引化后的数据集(list, TransactionStore或流式事务源)
+    :param chunk_size: 每块的事务个数
+    """
+    if isinstance(data_set, transactionStore.TransactionStore):
+        for start in range(0, len(data_set), chunk_size):
+            chunk = data_set[start:start + chunk_size]
+            yield chunk.offsets - chunk.offsets[0], chunk.rowItems()
+    elif hasattr(data_set, 'iterCsrChunks'):
+        for offsets, items in data_set.iterCsrChunks():
+            yield offsets, items
+    else:
+        chunk = list()
+        for t in data_set:
+            chunk.append(t)
+            if len(chunk) >= chunk_size:
+                store = transactionStore.fromIndexed(chunk)
+                yield store.offsets, store.items
+                chunk = list()
+        if chunk:
+            store = transactionStore.fromIndexed(chunk)
+            yield store.offsets, store.items
+
+
+def pairPositions(offsets):
+    """
+    求CSR中每个事务内所有i<j的位置对，与itertools.combinations(t, 2)枚举的项目对相同
+    :param offsets: 从0开始的offsets
+    :return: 前一个位置的数组, 后一个位置的数组
+    """
+    lengths = np.diff(offsets)
+    positions = np.arange(offsets[-1], dtype=np.int64)
+    row_ends = np.repeat(offsets[1:], lengths)
+    # 每个位置之后同一事务内还有几个项目
+    partners = row_ends - positions - 1
+    first = np.repeat(positions, partners)
+    group_starts = np.cumsum(partners) - partners
+    second = first + 1 + (np.arange(len(first), dtype=np.int64) - np.repeat(group_starts, partners))
+    return first, second
+
+
+def chunkPairs(offsets, items):
+    """
+    枚举一块事务中所有的项目对
+    :return: a数组, b数组 (int64)
+    """
+    first, second = pairPositions(offsets)
+    items = items.astype(np.int64)
+    return items[first], items[second]
+
+
+def itemMask(L1, items_len=None):
+    """
+    将频繁1项集转换成以项目索引为下标的bool数组，超出数组范围的项目视为不频繁
+    :param L1: 频繁1项集
+    :param items_len: 项目索引的上界，默认为L1中最大的项目索引+1
+    """
+    if items_len is None:
+        items_len = max([item for item_set in L1 for item in item_set] + [-1]) + 1
+    mask = np.zeros(items_len, dtype=bool)
+    for item_set in L1:
+        for item in item_set:
+            if item < items_len:
+                mask[item] = True
+    return mask
+
+
+def filterPairs(a, b, item_mask, filters):
+    """
+    只保留两个项目都频繁，且落在所有给定bitmap的frequent桶中的项目对，同一事务内重复的项目组成的(a, a)不去掉
+    :param a: 项目对的前一个项目
+    :param b: 项目对的后一个项目
+    :param item_mask: 频繁项目的bool数组，None表示不过滤
+    :param filters: (桶的数量, hash函数, 每个桶是否frequent的bool数组)的list
+    :return: a, b
+    """
+    keep = np.ones(len(a), dtype=bool)
+    if item_mask is not None:
+        in_range = (a < len(item_mask)) & (b < len(item_mask))
+        keep &= in_range
+        keep[in_range] &= item_mask[a[in_range]] & item_mask[b[in_range]]
+    for buckets_len, hash_func, frequent in filters:
+        positions = np.flatnonzero(keep)
+        passed = frequent[hash_func(a[positions], b[positions], buckets_len)]
+        keep[positions[~passed]] = False
+    return a[keep], b[keep]
+
+
+def maskChunk(offsets, items, item_mask):
+    """
+    只保留一块事务中的频繁项目，之后只对剩下的项目枚举项目对
+    :param offsets: 从0开始的offsets
+    :param items: 项目数组
+    :param item_mask: 频繁项目的bool数组
+    :return: 过滤后的offsets, items
+    """
+    keep = items < len(item_mask)
+    keep[keep] = item_mask[items[keep]]
+    kept = np.concatenate(([0], np.cumsum(keep, dtype=np.int64)))
+    return kept[offsets], items[keep]
+
+
+def uniqueRows(offsets, items):
+    """
+    每个事务内的项目去重并排序
+    :return: offsets, items
+    """
+    if len(items) == 0:
+        return offsets, items
+    items = items.astype(np.int64)
+    items_len = int(items.max()) + 1
+    row_ids = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+    keys = np.unique(row_ids * items_len + items)
+    row_lengths = np.bincount(keys // items_len, minlength=len(offsets) - 1)
+    return np.concatenate(([0], np.cumsum(row_lengths))), keys % items_len
+
+
+def chunkCandidatePairs(offsets, items, item_mask, filters):
+    """
+    先按item_mask过滤事务，再枚举项目对，只保留落在所有frequent桶中的项目对
+    与itertools.combinations(t, 2)相同，重复的项目组成的(a, a)也保留，单进程与多进程的桶计数都用这个函数枚举项目对
+    :param item_mask: 频繁项目的bool数组，None表示不过滤
+    :param filters: (桶的数量, hash函数, 每个桶是否frequent的bool数组)的list
+    :return: a数组, b数组
+    """
+    if item_mask is not None:
+        offsets, items = maskChunk(offsets, items, item_mask)
+    a, b = chunkPairs(offsets, items)
+    return filterPairs(a, b, None, filters)
+
+
+def distinctPairs(a, b):
+    """
+    去掉两个项目相同的项目对，C2只包含两个不同项目组成的项目对
+    :return: a, b
+    """
+    keep = a != b
+    return a[keep], b[keep]
+
+
+def pairKeys(a, b):
+    """
+    将项目对编码成int64：较小者 << 32 | 较大者
+    """
+    return (np.minimum(a, b) << 32) | np.maximum(a, b)
+
+
+def keysToItemsets(keys):
+    """
+    将项目对编码还原成frozenset构成的set
+    """
+    return set(frozenset([key >> 32, key & 0xFFFFFFFF]) for key in keys.tolist())
+
+
+def mergeKeys(keys_list):
+    """
+    合并多块去重后的项目对编码，只排序一次
+    :param keys_list: 项目对编码数组list
+    :return: 排好序且去重的项目对编码数组
+    """
+    if not keys_list:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.concatenate(keys_list))
+
+
+def appendKeys(keys_list, keys, merge_chunks=64):
+    """
+    将一块的项目对编码去重后加入keys_list，每merge_chunks块合并一次，避免每块都重新排序已有的全部编码，
+    同时限制重复编码占用的内存
+    """
+    keys_list.append(np.unique(keys))
+    if len(keys_list) >= merge_chunks:
+        keys_list[:] = [mergeKeys(keys_list)]
+
+
+def candidatePairKeys(data_set, item_mask, filters, chunk_size=10000, filter_counts=None):
+    """
+    扫描一遍，求两个项目都频繁且落在所有frequent桶中的项目对，即C2
+    :param data_set: 索引化后的数据集
+    :param item_mask: 频繁项目的bool数组
+    :param filters: (桶的数量, hash函数, 每个桶是否frequent的bool数组)的list
+    :param chunk_size: 每块的事务个数
+    :param filter_counts: 传入dict时，写入出现过的项目对个数'pairs'，被频繁项目过滤掉的个数'item_pruned'，
+                          以及依次被每个bitmap过滤掉的个数list'bucket_pruned'(需要额外的去重，只在统计时使用)
+    :return: 排好序的项目对编码数组(int64)
+    """
+    keys_list = list()
+    # 每一级过滤之前出现过的项目对
+    stage_keys = None
+    if filter_counts is not None:
+        stage_keys = [list() for _ in range(len(filters) + 1)]
+    for offsets, items in iterCsrChunks(data_set, chunk_size):
+        if stage_keys is None:
+            a, b = distinctPairs(*chunkCandidatePairs(offsets, items, item_mask, filters))
+        else:
+            a, b = distinctPairs(*chunkPairs(offsets, items))
+            appendKeys(stage_keys[0], pairKeys(a, b))
+            a, b = filterPairs(a, b, item_mask, [])
+            for index, bucket_filter in enumerate(filters):
+                appendKeys(stage_keys[index + 1], pairKeys(a, b))
+                a, b = filterPairs(a, b, None, [bucket_filter])
+        appendKeys(keys_list, pairKeys(a, b))
+    keys = mergeKeys(keys_list)
+    if filter_counts is not None:
+        sizes = [len(mergeKeys(stage)) for stage in stage_keys] + [len(keys)]
+        filter_counts['pairs'] = sizes[0]
+        filter_counts['item_pruned'] = sizes[0] - sizes[1] if filters else sizes[0] - sizes[-1]
+        filter_counts['bucket_pruned'] = [sizes[index + 1] - sizes[index + 2] for index in range(len(filters))]
+    return keys
+
+
+def addBucketCounts(counts, hash_codes):
+    """
+    将一块的下标原地累加到计数数组中(例如项目对的hash值累加到桶计数)，代价只与本块的个数有关，与计数数组的长度无关
+    (np.bincount(minlength=len(counts))每块都要分配并遍历整个计数数组)
+    :param counts: 计数数组，原地修改
+    :param hash_codes: 本块的下标数组，例如项目对的hash值
+    """
+    buckets, bucket_counts = np.unique(hash_codes, return_counts=True)
+    counts[buckets] += bucket_counts.astype(counts.dtype)
+
+
+def countCandidatePairs(data_set, keys, item_mask, chunk_size=10000):
+    """
+    统计候选项目对的事务支持个数
+    :param data_set: 索引化后的数据集
+    :param keys: 排好序的项目对编码数组
+    :param item_mask: 频繁项目的bool数组，候选项目对的项目都在其中
+    :param chunk_size: 每块的事务个数
+    :return: 与keys对应的计数数组
+    """
+    counts = np.zeros(len(keys), dtype=np.int64)
+    if len(keys) == 0:
+        return counts
+    for offsets, items in iterCsrChunks(data_set, chunk_size):
+        offsets, items = maskChunk(offsets, items, item_mask)
+        # 同一事务内重复的项目只算一次
+        offsets, items = uniqueRows(offsets, items)
+        a, b = chunkPairs(offsets, items)
+        chunk_keys = pairKeys(a, b)
+        positions = np.searchsorted(keys, chunk_keys)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == chunk_keys[found]
+        addBucketCounts(counts, positions[found])
+    return counts
+
+
+def frequentPairs(keys, counts, data_num, min_support, support_data):
+    """
+    由候选项目对的计数生成频繁2项集
+    :return: 频繁2项集L2
+    """
+    L2 = set()
+    data_num = float(data_num)
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        if count > 0 and (count / data_num) >= min_support:
+            item_set = frozenset([key >> 32, key & 0xFFFFFFFF])
+            L2.add(item_set)
+            support_data[item_set] = count / data_num
+    return L2
+
+
+def countPairBuckets(data_set, buckets_len, hash_func, chunk_size=10000):
+    """
+    将所有项目对hash到桶中计数，按块向量化枚举项目对、计算hash，原地累加到桶计数中
+    :param data_set: 索引化后的数据集
+    :param buckets_len: 桶的数量
+    :param hash_func: hash函数f(a, b, buckets_len)，需支持numpy数组
+    :param chunk_size: 每块的事务个数
+    :return: 每个桶的计数(uint32数组)
+    """
+    counts = np.zeros(buckets_len, dtype=np.uint32)
+    for offsets, items in iterCsrChunks(data_set, chunk_size):
+        a, b = chunkCandidatePairs(offsets, items, None, [])
+        if len(a) == 0:
+            continue
+        hash_codes = hash_func(a, b, buckets_len)
+        addBucketCounts(counts, hash_codes)
+    return counts
+
+
+def chunkItemCounts(offsets, items, items_len):
+    """
+    统计一块事务中每个项目出现在几个事务中，同一事务内重复的项目只算一次
+    :param items_len: 项目索引的上界
+    :return: 长度为items_len的计数数组
+    """
+    items = items.astype(np.int64)
+    row_ids = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+    keys = np.unique(row_ids * items_len + items)
+    return np.bincount(keys % items_len, minlength=items_len)
+
+
+def countFirstPass(data_set, tables, chunk_size=10000):
+    """
+    first pass只扫描一遍：用以项目索引为下标的数组统计项目计数，同时将项目对hash到所有hash表中
+    :param data_set: 索引化后的数据集
+    :param tables: (桶的数量, hash函数)的list
+    :param chunk_size: 每块的事务个数
+    :return: 项目计数数组, 每个hash表的桶计数list, 事务个数
+    """
+    item_counts = np.zeros(0, dtype=np.int64)
+    bucket_counts = [np.zeros(buckets_len, dtype=np.uint32) for buckets_len, hash_func in tables]
+    data_num = 0
+    for offsets, items in iterCsrChunks(data_set, chunk_size):
+        data_num += len(offsets) - 1
+        if len(items) == 0:
+            continue
+        items_len = int(items.max()) + 1
+        if items_len > len(item_counts):
+            item_counts = np.concatenate((item_counts, np.zeros(items_len - len(item_counts), dtype=np.int64)))
+        item_counts += chunkItemCounts(offsets, items, len(item_counts))
+        a, b = chunkCandidatePairs(offsets, items, None, [])
+        if len(a) == 0:
+            continue
+        for (buckets_len, hash_func), counts in zip(tables, bucket_counts):
+            hash_codes = hash_func(a, b, buckets_len)
+            addBucketCounts(counts, hash_codes)
+    return item_counts, bucket_counts, data_num
+
+
+def frequentItems(item_counts, data_num, min_support, support_data):
+    """
+    由项目计数数组生成频繁1项集
+    :param item_counts: 以项目索引为下标的计数数组
+    :param data_num: 事务个数
+    :param min_support: 最小支持度
+    :param support_data: 项目集-支持度dict
+    :return: 频繁1项集L1
+    """
+    L1 = set()
+    data_num = float(data_num)
+    for item in np.flatnonzero((item_counts > 0) & frequentBuckets(item_counts, data_num, min_support)):
+        item_set = frozenset([int(item)])
+        L1.add(item_set)
+        support_data[item_set] = item_counts[item] / data_num
+    return L1
+
+
+def frequentBuckets(counts, data_num, min_support):
+    """
+    :return: 每个桶是否frequent的bool数组
+    """
+    return (counts / float(data_num)) >= min_support
+
+
+def packVector(frequent):
+    """
+    将bool数组压缩成位图，第i位对应第i个桶
+    :param frequent: bool数组
+    :return: packbits后的uint8数组
+    """
+    return np.packbits(frequent, bitorder='little')
+
+
+def vectorToInt(packed_vector):
+    """
+    将packbits后的位图转换成int类型的vector，第i位为1表示对应的bucket是frequent的
+    """
+    return int.from_bytes(packed_vector.tobytes(), 'little')
+
+
+def isFrequentBucket(vector, index):
+    """
+    判断vector中第index个bucket是否frequent，vector可以是int或packbits后的数组
+    """
+    if isinstance(vector, np.ndarray):
+        return bool((vector[index >> 3] >> (index & 7)) & 1)
+    return bool((vector >> index) & 1)
+
+
+def countsToVector(counts, data_num, min_support, packed=False):
+    """
+    由桶计数生成vector
+    :param packed: True返回packbits后的uint8数组，False返回int
+    """
+    packed_vector = packVector(frequentBuckets(counts, data_num, min_support))
+    if packed:
+        return packed_vector
+    return vectorToInt(packed_vector)
+
+
+def generateVector(data_set, buckets_len, min_support, hash_func, packed=False):
+    """
+    生成vector，第i位上为1表示对应的bucket是frequent的
+    :param data_set: 索引化后的数据集
+    :param buckets_len: 桶的数量
+    :param min_support: support阈值
+    :param hash_func: hash函数f(a, b, buckets_len)
+    :param packed: True返回packbits后的uint8数组，False返回int
+    :return: vector
+    """
+    counts = countPairBuckets(data_set, buckets_len, hash_func)
+    return countsToVector(counts, len(data_set), min_support, packed)
+
+
+def unpackVector(vector, buckets_len):
+    """
+    将vector(int或packbits后的数组)转换成每个桶是否frequent的bool数组
+    """
+    if not isinstance(vector, np.ndarray):
+        vector = np.frombuffer(vector.to_bytes((buckets_len + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(vector, bitorder='little')[:buckets_len].astype(bool)
+
+
+def frequentBucketCount(vector):
+    """
+    :return: vector中frequent的bucket个数
+    """
+    if isinstance(vector, np.ndarray):
+        return int(np.unpackbits(vector).sum())
+    return bin(vector).count('1')
+
+
+def filterStats(C2, L2, vectors):
+    """
+    统计bucket过滤的效果，误报率为通过过滤的候选项目对中实际不频繁的比例
+    :param C2: 通过过滤的候选频繁2项集
+    :param L2: 频繁2项集
+    :param vectors: (vector, 桶的数量)的list
+    :return: dict
+    """
+    stats = dict()
+    stats['frequent_buckets'] = [frequentBucketCount(vector) for vector, buckets_len in vectors]
+    stats['frequent_bucket_rate'] = [frequentBucketCount(vector) / float(buckets_len)
+                                     for vector, buckets_len in vectors]
+    stats['candidates'] = len(C2)
+    stats['frequent'] = len(L2)
+    stats['false_positive_rate'] = (len(C2) - len(L2)) / float(len(C2)) if len(C2) > 0 else 0.0
+    return stats
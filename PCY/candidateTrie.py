@@ -0,0 +1,127 @@
+import itertools
+from PCY import transactionStore
+
+
+def createTrie(Ck):
+    """
+    由候选频繁k项集构造前缀树，每个候选项集按排序后的项目依次挂在树上
+    叶子层的结点中存放的是候选项集在列表中的下标
+    :param Ck: 候选频繁k项集
+    :return: 前缀树根结点(dict), 候选项集列表, 候选项集中出现过的项目集合, k
+    """
+    root = dict()
+    Ck_list = list(Ck)
+    all_items = set()
+    k = 0
+    for index, Ck_item in enumerate(Ck_list):
+        items = sorted(Ck_item)
+        all_items.update(items)
+        k = len(items)
+        node = root
+        for item in items[:-1]:
+            if item not in node:
+                node[item] = dict()
+            node = node[item]
+        node[items[-1]] = index
+    return root, Ck_list, all_items, k
+
+
+def walkTrie(node, t, start, depth, k, counts):
+    """
+    事务沿前缀树只走一遍，为其包含的候选项集计数
+    :param node: 当前结点
+    :param t: 过滤并排序后的事务
+    :param start: 事务中下一个待匹配项目的位置
+    :param depth: 当前结点的深度，根结点为0
+    :param k: 候选项集的项数
+    :param counts: 候选项集的计数列表
+    :return:
+    """
+    if depth == k - 1:
+        for i in range(start, len(t)):
+            index = node.get(t[i])
+            if index is not None:
+                counts[index] += 1
+        return
+    # 剩余项目不足以凑满k项时提前结束
+    for i in range(start, len(t) - (k - 1 - depth)):
+        child = node.get(t[i])
+        if child is not None:
+            walkTrie(child, t, i + 1, depth + 1, k, counts)
+
+
+def countSupport(data_set, Ck):
+    """
+    统计候选频繁k项集的事务支持个数，可直接替换generateLkByCk中逐个候选集issubset的内层循环
+    :param data_set: 数据库事务集
+    :param Ck: 候选频繁k项集
+    :return: 候选项集-出现次数dict，只包含出现过的候选项集
+    """
+    return countSupportByLevel(data_set, [Ck])
+
+
+def countSupportByLevel(data_set, Ck_list, count_singletons=False):
+    """
+    扫描一遍数据集，同时统计多个不同项数的候选集的事务支持个数
+    :param data_set: 数据库事务集
+    :param Ck_list: 候选集list，每个元素为一个项数相同的候选集
+    :param count_singletons: 是否同时统计所有出现过的1项集
+    :return: 候选项集-出现次数dict，只包含出现过的候选项集
+    """
+    tries = list()
+    all_items = set()
+    for Ck in Ck_list:
+        root, candidates, trie_items, k = createTrie(Ck)
+        if k > 0:
+            tries.append((root, candidates, k, [0] * len(candidates)))
+            all_items.update(trie_items)
+    item_count = dict()
+    if not tries and not count_singletons:
+        return item_count
+    min_k = min([k for root, candidates, k, counts in tries] + [1])
+    for t in transactionStore.iterTransactions(data_set):
+        if count_singletons:
+            for item in set(int(item) for item in t):
+                item_set = frozenset([item])
+                item_count[item_set] = item_count.get(item_set, 0) + 1
+        # 只保留在候选项集中出现过的项目，去重后排序
+        items = sorted(set(int(item) for item in t if item in all_items))
+        if len(items) < min_k:
+            continue
+        for root, candidates, k, counts in tries:
+            if len(items) >= k:
+                walkTrie(root, items, 0, 0, k, counts)
+    for root, candidates, k, counts in tries:
+        for index, count in enumerate(counts):
+            if count > 0:
+                item_count[candidates[index]] = count
+    return item_count
+
+
+def countSupportWithBuckets(data_set, Ck, next_k, buckets_len, hash_func):
+    """
+    统计候选频繁k项集的事务支持个数，同一遍扫描中把事务的所有next_k项子集hash到桶中计数，
+    供下一层像PCY一样过滤候选集。只枚举在Ck中出现过的项目，频繁next_k项集的项目必然都在其中
+    :param data_set: 数据库事务集
+    :param Ck: 候选频繁k项集
+    :param next_k: 下一层的项数
+    :param buckets_len: 桶的数量
+    :param hash_func: 项集hash函数f(排好序的tuple, buckets_len)
+    :return: 候选项集-出现次数dict, 桶计数list
+    """
+    root, candidates, all_items, k = createTrie(Ck)
+    counts = [0] * len(candidates)
+    bucket_counts = [0] * buckets_len
+    if k > 0:
+        for t in transactionStore.iterTransactions(data_set):
+            items = sorted(set(int(item) for item in t if item in all_items))
+            if len(items) < k:
+                continue
+            walkTrie(root, items, 0, 0, k, counts)
+            for next_items in itertools.combinations(items, next_k):
+                bucket_counts[hash_func(next_items, buckets_len)] += 1
+    item_count = dict()
+    for index, count in enumerate(counts):
+        if count > 0:
+            item_count[candidates[index]] = count
+    return item_count, bucket_counts
@@ -0,0 +1,308 @@
+import math
+import os
+import random
+import sys
+import numpy as np
+
+if __name__ == "__main__":
+    # 与pcy.py相同，支持在PCY目录中直接运行
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PCY import bucketCounter
+from PCY import hashFamily
+from PCY.pcy import loadDataSet, makeIndex, resumeDataSet
+
+
+class CountMinSketch(object):
+    """
+    用Count-Min Sketch近似统计所有项目对的事务支持个数，内存固定为depth * width个计数
+    估计值不会偏小，以1 - delta的概率偏大不超过epsilon * 项目对总个数，其中width = e / epsilon，depth = ln(1 / delta)
+    同时精确统计每个项目的计数，并维护一个估计支持度不低于heavy_support的项目对列表(heavy hitters)
+    参数相同的sketch可以合并，也可以保存到磁盘
+    """
+
+    def __init__(self, width, depth, seed=0, heavy_support=0.001, heavy_len=100000):
+        """
+        :param width: 每行的计数个数
+        :param depth: 行数，即hash函数个数
+        :param seed: 随机种子，合并的sketch必须相同
+        :param heavy_support: heavy hitters的支持度阈值
+        :param heavy_len: heavy hitters最多保留的项目对个数
+        """
+        self.width = int(width)
+        self.depth = int(depth)
+        self.seed = seed
+        self.heavy_support = heavy_support
+        self.heavy_len = heavy_len
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.item_counts = np.zeros(0, dtype=np.int64)
+        self.heavy = np.zeros(0, dtype=np.int64)
+        self.data_num = 0
+        # 加入的项目对总个数
+        self.pair_num = 0
+        rng = random.Random(seed)
+        self.hash_funcs = [hashFamily.UniversalHash(rng.randrange(0, 1 << 31)) for _ in range(self.depth)]
+
+    def epsilon(self):
+        """
+        :return: 估计的计数偏大不超过项目对总个数的比例
+        """
+        return math.e / self.width
+
+    def supportError(self):
+        """
+        :return: 估计的支持度偏大不超过的值，即epsilon * 项目对总个数 / 事务个数
+        """
+        if self.data_num == 0:
+            return 0.0
+        return self.epsilon() * self.pair_num / float(self.data_num)
+
+    def delta(self):
+        """
+        :return: 估计偏大超过epsilon的概率
+        """
+        return math.exp(-self.depth)
+
+    def estimateKeys(self, keys):
+        """
+        估计项目对的事务支持个数
+        :param keys: 项目对编码数组(较小者 << 32 | 较大者)
+        :return: 估计的计数数组
+        """
+        a = keys >> 32
+        b = keys & 0xFFFFFFFF
+        estimates = None
+        for row, hash_func in enumerate(self.hash_funcs):
+            row_counts = self.table[row][hash_func(a, b, self.width)]
+            estimates = row_counts if estimates is None else np.minimum(estimates, row_counts)
+        return estimates
+
+    def addChunk(self, offsets, items):
+        """
+        将一块事务中的项目与项目对加入sketch
+        :param offsets: 从0开始的offsets
+        :param items: 项目数组
+        """
+        self.data_num += len(offsets) - 1
+        if len(items) == 0:
+            return
+        # 支持度按事务计，同一事务内重复的项目只算一次
+        offsets, items = bucketCounter.uniqueRows(offsets, items)
+        items_len = int(items.max()) + 1
+        if items_len > len(self.item_counts):
+            self.item_counts = np.concatenate((self.item_counts,
+                                               np.zeros(items_len - len(self.item_counts), dtype=np.int64)))
+        self.item_counts += np.bincount(items, minlength=len(self.item_counts))
+        a, b = bucketCounter.chunkPairs(offsets, items)
+        if len(a) == 0:
+            return
+        self.pair_num += len(a)
+        for row, hash_func in enumerate(self.hash_funcs):
+            bucketCounter.addBucketCounts(self.table[row], hash_func(a, b, self.width))
+        self.updateHeavy(np.unique(bucketCounter.pairKeys(a, b)))
+
+    def updateHeavy(self, keys):
+        """
+        将keys并入heavy hitters，只保留估计支持度不低于heavy_support的项目对，最多heavy_len个
+        估计值只增不减，真实支持度不低于heavy_support的项目对在最后一次出现之后不会被删掉
+        """
+        keys = np.union1d(self.heavy, keys)
+        estimates = self.estimateKeys(keys)
+        keep = estimates >= self.heavy_support * self.data_num
+        keys = keys[keep]
+        estimates = estimates[keep]
+        if len(keys) > self.heavy_len:
+            order = np.argsort(-estimates, kind='stable')[:self.heavy_len]
+            keys = np.sort(keys[order])
+        self.heavy = keys
+
+    def addDataSet(self, data_set, chunk_size=10000):
+        """
+        扫描一遍数据集，加入sketch
+        :param data_set: 索引化后的数据集
+        :param chunk_size: 每块的事务个数
+        :return: self
+        """
+        for offsets, items in bucketCounter.iterCsrChunks(data_set, chunk_size):
+            self.addChunk(offsets, items)
+        return self
+
+    def isMergeable(self, other):
+        return (self.width, self.depth, self.seed) == (other.width, other.depth, other.seed)
+
+    def merge(self, other):
+        """
+        合并另一个分片的sketch，计数直接相加，不需要重新扫描
+        在两个分片中都不是heavy hitter的项目对，在合并后也不是
+        :param other: width, depth, seed相同的CountMinSketch
+        :return: self
+        """
+        if not self.isMergeable(other):
+            raise ValueError("sketches with different width, depth or seed can not be merged")
+        self.table += other.table
+        items_len = max(len(self.item_counts), len(other.item_counts))
+        item_counts = np.zeros(items_len, dtype=np.int64)
+        item_counts[:len(self.item_counts)] += self.item_counts
+        item_counts[:len(other.item_counts)] += other.item_counts
+        self.item_counts = item_counts
+        self.data_num += other.data_num
+        self.pair_num += other.pair_num
+        self.updateHeavy(other.heavy)
+        return self
+
+    def save(self, path):
+        """
+        用np.savez保存到磁盘，path没有.npz后缀时会自动加上
+        :param path: 文件路径
+        """
+        np.savez(path, table=self.table, item_counts=self.item_counts, heavy=self.heavy,
+                 params=np.array([self.width, self.depth, self.seed, self.data_num, self.pair_num, self.heavy_len],
+                                 dtype=np.int64),
+                 heavy_support=np.array([self.heavy_support]))
+
+    def frequentItems(self, min_support, support_data, error_data=None):
+        """
+        频繁1项集，项目计数是精确的
+        :return: 频繁1项集L1
+        """
+        L1 = bucketCounter.frequentItems(self.item_counts, self.data_num, min_support, support_data)
+        if error_data is not None:
+            for item_set in L1:
+                error_data[item_set] = 0.0
+        return L1
+
+    def frequentPairs(self, min_support, support_data, error_data=None):
+        """
+        由heavy hitters求估计的频繁2项集，min_support应不低于heavy_support
+        :param min_support: 最小支持度
+        :param support_data: 项目集-估计支持度dict
+        :param error_data: 项目集-支持度误差上界dict，真实支持度在[估计值 - 误差, 估计值]中
+        :return: 估计的频繁2项集L2
+        """
+        if min_support < self.heavy_support:
+            raise ValueError("min_support %s is lower than heavy_support %s" % (min_support, self.heavy_support))
+        data_num = float(self.data_num)
+        L2 = set()
+        if data_num == 0:
+            return L2
+        estimates = self.estimateKeys(self.heavy)
+        support_error = self.supportError()
+        for key, estimate in zip(self.heavy.tolist(), estimates.tolist()):
+            if (estimate / data_num) >= min_support:
+                item_set = frozenset([key >> 32, key & 0xFFFFFFFF])
+                L2.add(item_set)
+                support_data[item_set] = estimate / data_num
+                if error_data is not None:
+                    error_data[item_set] = min(support_error, estimate / data_num)
+        return L2
+
+
+def averagePairs(data_set, chunk_size=10000):
+    """
+    平均每个事务的项目对个数(同一事务内重复的项目只算一次)，只用到每个事务的项目个数，不枚举项目对
+    :param data_set: 索引化后的数据集
+    :param chunk_size: 每块的事务个数
+    """
+    data_num = 0
+    pair_num = 0
+    for offsets, items in bucketCounter.iterCsrChunks(data_set, chunk_size):
+        data_num += len(offsets) - 1
+        lengths = np.diff(bucketCounter.uniqueRows(offsets, items)[0])
+        pair_num += int((lengths * (lengths - 1) // 2).sum())
+    if data_num == 0:
+        return 0.0
+    return pair_num / float(data_num)
+
+
+def sketchEpsilon(min_support, pairs_per_basket, error_ratio=0.1):
+    """
+    由最小支持度确定epsilon：支持度的误差上界为epsilon * 平均每个事务的项目对个数，
+    令其不超过min_support * error_ratio，即epsilon = min_support * error_ratio / 平均每个事务的项目对个数
+    例如Groceries平均每个事务约14个项目对，min_support = 0.005时epsilon约为3.6e-5，width约为76000
+    :param min_support: 最小支持度
+    :param pairs_per_basket: 平均每个事务的项目对个数，见averagePairs
+    :param error_ratio: 支持度误差上界与min_support之比
+    :return: epsilon
+    """
+    return min_support * error_ratio / max(pairs_per_basket, 1.0)
+
+
+def createSketch(epsilon=0.001, delta=0.01, seed=0, heavy_support=0.001, heavy_len=100000):
+    """
+    按误差要求生成sketch
+    支持度的误差上界为epsilon * 平均每个事务的项目对个数，只有远小于heavy_support时估计的频繁2项集才接近精确结果，
+    默认的epsilon只适合项目对很少的事务，一般用sketchEpsilon由最小支持度确定
+    :param epsilon: 估计的计数偏大不超过epsilon * 项目对总个数
+    :param delta: 偏大超过的概率
+    :return: CountMinSketch
+    """
+    width = int(math.ceil(math.e / epsilon))
+    depth = int(math.ceil(math.log(1.0 / delta)))
+    return CountMinSketch(width, depth, seed, heavy_support, heavy_len)
+
+
+def loadSketch(path):
+    """
+    从磁盘读取sketch
+    :param path: save时的文件路径
+    :return: CountMinSketch
+    """
+    if not path.endswith('.npz'):
+        path += '.npz'
+    with np.load(path) as f:
+        width, depth, seed, data_num, pair_num, heavy_len = [int(value) for value in f['params']]
+        sketch = CountMinSketch(width, depth, seed, float(f['heavy_support'][0]), heavy_len)
+        sketch.table = f['table'].copy()
+        sketch.item_counts = f['item_counts'].copy()
+        sketch.heavy = f['heavy'].copy()
+        sketch.data_num = data_num
+        sketch.pair_num = pair_num
+    return sketch
+
+
+def generateL2(data_set, min_support, epsilon=None, delta=0.01, seed=0, error_ratio=0.1):
+    """
+    近似模式：扫描一遍，用Count-Min Sketch估计频繁1项集与频繁2项集
+    :param data_set: 索引化后的数据集
+    :param min_support: 最小支持度
+    :param epsilon: 估计的计数偏大不超过epsilon * 项目对总个数，None时由sketchEpsilon按min_support与error_ratio确定
+    :param delta: 偏大超过的概率
+    :param seed: 随机种子
+    :param error_ratio: epsilon为None时，支持度误差上界与min_support之比
+    :return: L1, L2, support_data, error_data(与support_data结构相同的误差上界dict)
+    """
+    if epsilon is None:
+        epsilon = sketchEpsilon(min_support, averagePairs(data_set), error_ratio)
+    sketch = createSketch(epsilon, delta, seed, heavy_support=min_support)
+    sketch.addDataSet(data_set)
+    support_data = dict()
+    error_data = dict()
+    L1 = sketch.frequentItems(min_support, support_data, error_data)
+    L2 = sketch.frequentPairs(min_support, support_data, error_data)
+    return L1, L2, support_data, error_data
+
+
+def test():
+    min_support = 0.005
+    data_set = loadDataSet()
+    indexed_data_set, index2data = makeIndex(data_set)
+    # 两个分片分别建sketch，合并后保存，之后可以继续合并新的分片，两个分片的epsilon必须相同
+    epsilon = sketchEpsilon(min_support, averagePairs(indexed_data_set))
+    half = len(indexed_data_set) // 2
+    sketch = createSketch(epsilon, 0.01, heavy_support=min_support).addDataSet(indexed_data_set[:half])
+    other = createSketch(epsilon, 0.01, heavy_support=min_support).addDataSet(indexed_data_set[half:])
+    sketch.merge(other)
+    sketch.save('pair_sketch.npz')
+    sketch = loadSketch('pair_sketch.npz')
+    support_data = dict()
+    error_data = dict()
+    L2 = sketch.frequentPairs(min_support, support_data, error_data)
+    L2_data = resumeDataSet(list(L2), index2data)
+    for term in L2_data:
+        print(term)
+    print(str(len(L2_data)))
+    print("support error:\t" + str(sketch.supportError()) + "\tdelta:\t" + str(sketch.delta()))
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,154 @@
+import random
+import re
+import numpy as np
+
+MASK32 = 0xFFFFFFFF
+# 2^31 - 1，梅森素数
+PRIME31 = 2147483647
+# 桶计数使用uint32
+COUNT_BYTES = 4
+
+
+def canonicalPair(a, b):
+    """
+    将项目对整理成(较小者, 较大者)，使hash与项目对的顺序无关
+    numpy数组转换成uint64，避免乘法溢出
+    :return: lo, hi, 常数类型
+    """
+    if isinstance(a, np.ndarray):
+        lo = np.minimum(a, b).astype(np.uint64)
+        hi = np.maximum(a, b).astype(np.uint64)
+        return lo, hi, np.uint64
+    return min(a, b), max(a, b), int
+
+
+def toIndex(hash_codes):
+    """
+    numpy的hash结果转换成int64，便于np.bincount
+    """
+    if isinstance(hash_codes, np.ndarray):
+        return hash_codes.astype(np.int64)
+    return int(hash_codes)
+
+
+class ProductHash(object):
+    """
+    原先的hash函数 (a * b) % n，包含项目0的项目对都落在0号桶
+    """
+
+    def __call__(self, a, b, buckets_len):
+        return (a * b) % buckets_len
+
+
+class SumHash(object):
+    """
+    原先的第二个hash函数 (a + b) % n
+    """
+
+    def __call__(self, a, b, buckets_len):
+        return (a + b) % buckets_len
+
+
+class UniversalHash(object):
+    """
+    Carter-Wegman全域hash：((p * lo + q * hi + r) mod P) mod n，P = 2^31 - 1
+    """
+
+    def __init__(self, seed=0):
+        rng = random.Random(seed)
+        self.p = rng.randrange(1, PRIME31)
+        self.q = rng.randrange(1, PRIME31)
+        self.r = rng.randrange(0, PRIME31)
+
+    def __call__(self, a, b, buckets_len):
+        lo, hi, U = canonicalPair(a, b)
+        x = (U(self.p) * lo + U(self.q) * hi + U(self.r)) % U(PRIME31)
+        return toIndex(x % U(buckets_len))
+
+
+class MultiplyShiftHash(object):
+    """
+    multiply-shift hash：x = (m1 * lo + m2 * hi + c) mod 2^32，取x * n的高32位作为桶号
+    """
+
+    def __init__(self, seed=0):
+        rng = random.Random(seed)
+        # 乘数取奇数
+        self.m1 = rng.randrange(0, 1 << 32) | 1
+        self.m2 = rng.randrange(0, 1 << 32) | 1
+        self.c = rng.randrange(0, 1 << 32)
+
+    def __call__(self, a, b, buckets_len):
+        lo, hi, U = canonicalPair(a, b)
+        x = (U(self.m1) * lo + U(self.m2) * hi + U(self.c)) & U(MASK32)
+        return toIndex((x * U(buckets_len)) >> U(32))
+
+
+class MurmurHash(object):
+    """
+    murmur3风格的hash：将项目对混合成32位整数后做fmix32，再对n取模
+    """
+
+    def __init__(self, seed=0):
+        self.seed = random.Random(seed).randrange(0, 1 << 32)
+
+    def __call__(self, a, b, buckets_len):
+        lo, hi, U = canonicalPair(a, b)
+        h = ((lo * U(0x9E3779B1)) & U(MASK32)) ^ hi ^ U(self.seed)
+        h ^= h >> U(16)
+        h = (h * U(0x85EBCA6B)) & U(MASK32)
+        h ^= h >> U(13)
+        h = (h * U(0xC2B2AE35)) & U(MASK32)
+        h ^= h >> U(16)
+        return toIndex(h % U(buckets_len))
+
+
+HASH_FAMILIES = {
+    'product': ProductHash,
+    'sum': SumHash,
+    'universal': UniversalHash,
+    'multiply-shift': MultiplyShiftHash,
+    'murmur': MurmurHash,
+}
+
+
+def createHash(kind, seed=0):
+    """
+    生成hash函数f(a, b, buckets_len)，同时支持int与numpy数组
+    :param kind: 'product', 'sum', 'universal', 'multiply-shift' or 'murmur'
+    :param seed: 随机种子，不同的种子得到同一族中不同的hash函数
+    :return: hash函数
+    """
+    if kind not in HASH_FAMILIES:
+        raise ValueError("unknown hash family: %s" % kind)
+    if kind in ('product', 'sum'):
+        return HASH_FAMILIES[kind]()
+    return HASH_FAMILIES[kind](seed)
+
+
+def parseMemory(memory):
+    """
+    解析内存大小，例如'512MB', '2G', 1048576
+    :param memory: 字符串或字节数
+    :return: 字节数
+    """
+    if isinstance(memory, int):
+        return memory
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$', str(memory).upper())
+    if match is None:
+        raise ValueError("invalid memory size: %s" % memory)
+    units = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+    return int(float(match.group(1)) * units[match.group(2)])
+
+
+def bucketsForMemory(memory, tables=1):
+    """
+    根据内存预算确定每个hash表的桶数
+    :param memory: 所有hash表共用的内存预算，例如'512MB'
+    :param tables: 同时存在的hash表个数
+    :return: 每个hash表的桶数
+    """
+    buckets_len = parseMemory(memory) // (COUNT_BYTES * tables)
+    if buckets_len < 1:
+        raise ValueError("memory budget too small: %s" % memory)
+    return int(buckets_len)
@@ -0,0 +1,87 @@
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # windows上没有resource模块，不统计峰值内存
+    resource = None
+
+
+def memoryUsage():
+    """
+    :return: dict，包括进程的峰值内存peak_rss_kb，以及tracemalloc开启时当前与峰值的python内存分配
+    """
+    usage = dict()
+    if resource is not None:
+        # Linux上ru_maxrss的单位为KB
+        usage['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        usage['traced_kb'] = current // 1024
+        usage['traced_peak_kb'] = peak // 1024
+    return usage
+
+
+def emit(hook, stage, start, **fields):
+    """
+    向hook发送一个事件，hook为None时什么也不做
+    :param hook: 接收事件dict的函数，例如list.append或printEvent
+    :param stage: 阶段名，例如'count', 'pcy_first_pass'
+    :param start: 阶段开始时的time.time()
+    :param fields: 事件的其它字段，例如k, candidates, frequent, frequent_buckets, *_pruned
+    """
+    if hook is None:
+        return
+    event = {'stage': stage, 'elapsed': time.time() - start}
+    event.update(fields)
+    event.update(memoryUsage())
+    hook(event)
+
+
+def printEvent(event):
+    """
+    按固定顺序打印事件，可以直接作为hook使用
+    """
+    fields = ['%s=%s' % (key, event[key]) for key in sorted(event) if key not in ('stage', 'elapsed')]
+    print("[%s]\t%.4fs\t%s" % (event['stage'], event['elapsed'], '\t'.join(fields)), file=sys.stderr)
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', action='store_true', help="print per-stage instrumentation events to stderr")
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'], help="profile the whole run")
+    parser.add_argument('--profile-top', type=int, default=25, help="number of profile entries to print")
+    return parser.parse_args(argv)
+
+
+def runMain(main, argv=None):
+    """
+    运行脚本的main(hook)，从命令行选择是否打印事件、是否用cProfile或tracemalloc分析，分析结果输出到stderr
+    :param main: 接收hook参数的函数
+    :param argv: 命令行参数，默认为sys.argv[1:]
+    :return: main的返回值
+    """
+    args = parseArgs(argv)
+    hook = printEvent if args.events else None
+    if args.profile == 'cprofile':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(main, hook)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(args.profile_top)
+        return result
+    if args.profile == 'tracemalloc':
+        tracemalloc.start()
+        try:
+            result = main(hook)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        print("top %d allocations by line:" % args.profile_top, file=sys.stderr)
+        for stat in snapshot.statistics('lineno')[:args.profile_top]:
+            print(stat, file=sys.stderr)
+        return result
+    return main(hook)
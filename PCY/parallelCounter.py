@@ -0,0 +1,231 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+if __name__ == "__main__":
+    # 与pcy.py相同，支持在PCY目录中直接运行
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PCY import bucketCounter
+from PCY import hashFamily
+from PCY import transactionStore
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # python3.8以下没有shared_memory，退回单进程计数
+    shared_memory = None
+
+# 每个worker进程中attach的共享内存与计数参数，由initWorker设置
+_worker = dict()
+
+
+def toStore(data_set):
+    """
+    将数据集转换成offsets从0开始的TransactionStore，便于按行切片放进共享内存
+    """
+    if isinstance(data_set, transactionStore.TransactionStore):
+        return data_set.compact()
+    return transactionStore.fromIndexed(transactionStore.iterTransactions(data_set))
+
+
+def createShared(array):
+    """
+    将数组复制到一块新的共享内存中
+    :return: SharedMemory, 共享内存上的数组
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[:] = array
+    return shm, shared
+
+
+def attachShared(name, shape, dtype):
+    """
+    worker进程中按名字attach共享内存
+    :return: SharedMemory, 共享内存上的数组
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def initWorker(next_row, offsets_spec, items_spec, counts_spec, item_counts_spec, tables, item_mask, filters):
+    """
+    ProcessPoolExecutor的initializer：attach事务与计数的共享内存，领取本进程在计数数组中的行，保存hash表与过滤条件
+    :param next_row: 下一个未被领取的行号(multiprocessing.Value)
+    :param offsets_spec: offsets的(共享内存名, shape, dtype)
+    :param items_spec: items的(共享内存名, shape, dtype)
+    :param counts_spec: 桶计数数组的(共享内存名, shape, dtype)，每个进程一行
+    :param item_counts_spec: 项目计数数组的(共享内存名, shape, dtype)，每个进程一行，None表示不统计项目计数
+    :param tables: (桶的数量, hash函数)的list
+    :param item_mask: 频繁项目的bool数组，None表示不过滤
+    :param filters: (桶的数量, hash函数, frequent bool数组)的list
+    """
+    with next_row.get_lock():
+        row = next_row.value
+        next_row.value += 1
+    _worker['offsets'] = attachShared(*offsets_spec)
+    _worker['items'] = attachShared(*items_spec)
+    _worker['counts'] = attachShared(*counts_spec)
+    _worker['item_counts'] = attachShared(*item_counts_spec) if item_counts_spec is not None else None
+    # 本进程的桶计数行按hash表切成几段视图，直接在共享内存中累加，不需要加锁
+    row_counts = _worker['counts'][1][row]
+    _worker['row_counts'] = list()
+    position = 0
+    for buckets_len, hash_func in tables:
+        _worker['row_counts'].append(row_counts[position:position + buckets_len])
+        position += buckets_len
+    _worker['row_item_counts'] = _worker['item_counts'][1][row] if _worker['item_counts'] is not None else None
+    _worker['tables'] = tables
+    _worker['item_mask'] = item_mask
+    _worker['filters'] = filters
+
+
+def countSlice(start, stop, chunk_size):
+    """
+    worker中统计第start到stop个事务，累加到本进程在共享计数数组中的行
+    :return: 处理的事务个数
+    """
+    offsets = _worker['offsets'][1]
+    items = _worker['items'][1]
+    tables = _worker['tables']
+    row_item_counts = _worker['row_item_counts']
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(stop, chunk_start + chunk_size)
+        chunk_offsets = offsets[chunk_start:chunk_stop + 1] - offsets[chunk_start]
+        chunk_items = items[offsets[chunk_start]:offsets[chunk_stop]]
+        if row_item_counts is not None and len(chunk_items) > 0:
+            row_item_counts += bucketCounter.chunkItemCounts(chunk_offsets, chunk_items, len(row_item_counts))
+        a, b = bucketCounter.chunkCandidatePairs(chunk_offsets, chunk_items, _worker['item_mask'], _worker['filters'])
+        if len(a) == 0:
+            continue
+        for (buckets_len, hash_func), counts in zip(tables, _worker['row_counts']):
+            bucketCounter.addBucketCounts(counts, hash_func(a, b, buckets_len))
+    return stop - start
+
+
+def countPairBuckets(data_set, tables, workers=None, item_mask=None, filters=(), chunk_size=10000):
+    """
+    多进程将项目对hash到桶中计数：事务的CSR数组放在共享内存中，每个worker处理若干段事务，
+    累加到共享计数数组中本进程的一行，全部完成后按行求和。计数为整数加法，结果与单进程逐位相同
+    :param data_set: 索引化后的数据集
+    :param tables: (桶的数量, hash函数)的list，hash函数需可pickle
+    :param workers: 进程数，None或不大于1时单进程计数
+    :param item_mask: 频繁项目的bool数组，None表示不过滤
+    :param filters: (桶的数量, hash函数, frequent bool数组)的list，项目对需落在所有frequent桶中才计数
+    :param chunk_size: 每块的事务个数
+    :return: 每个hash表的桶计数(uint32数组)list
+    """
+    # 默认单进程，只有调用者明确传入workers > 1时才启动进程池
+    if workers is None or workers <= 1 or shared_memory is None:
+        bucket_counts = [np.zeros(buckets_len, dtype=np.uint32) for buckets_len, hash_func in tables]
+        for offsets, items in bucketCounter.iterCsrChunks(data_set, chunk_size):
+            a, b = bucketCounter.chunkCandidatePairs(offsets, items, item_mask, list(filters))
+            if len(a) == 0:
+                continue
+            for (buckets_len, hash_func), counts in zip(tables, bucket_counts):
+                bucketCounter.addBucketCounts(counts, hash_func(a, b, buckets_len))
+        return bucket_counts
+    item_counts, bucket_counts, data_num = runWorkers(toStore(data_set), tables, workers, item_mask, filters,
+                                                      False, chunk_size)
+    return bucket_counts
+
+
+def countFirstPass(data_set, tables, workers=None, chunk_size=10000):
+    """
+    多进程的first pass，结果与bucketCounter.countFirstPass相同
+    :param data_set: 索引化后的数据集
+    :param tables: (桶的数量, hash函数)的list，hash函数需可pickle
+    :param workers: 进程数，None或不大于1时单进程计数
+    :param chunk_size: 每块的事务个数
+    :return: 项目计数数组, 每个hash表的桶计数list, 事务个数
+    """
+    # 默认单进程，只有调用者明确传入workers > 1时才启动进程池
+    if workers is None or workers <= 1 or shared_memory is None:
+        return bucketCounter.countFirstPass(data_set, tables, chunk_size)
+    return runWorkers(toStore(data_set), tables, workers, None, (), True, chunk_size)
+
+
+def runWorkers(store, tables, workers, item_mask, filters, count_items, chunk_size):
+    """
+    将store与计数数组放进共享内存，按段分给worker计数
+    计数数组每个worker一行(共workers * 桶的总数个计数)，worker之间不需要加锁，最后在主进程中按行求和
+    :return: 项目计数数组(count_items为False时为None), 每个hash表的桶计数list, 事务个数
+    """
+    data_num = len(store)
+    total_buckets = sum(buckets_len for buckets_len, hash_func in tables)
+    shms = list()
+    offsets_shm, offsets = createShared(store.offsets)
+    shms.append(offsets_shm)
+    items_shm, items = createShared(store.items)
+    shms.append(items_shm)
+    counts_shm, counts = createShared(np.zeros((workers, total_buckets), dtype=np.uint32))
+    shms.append(counts_shm)
+    item_counts = None
+    item_counts_spec = None
+    if count_items:
+        item_counts_shm, item_counts = createShared(np.zeros((workers, store.itemsLen()), dtype=np.int64))
+        shms.append(item_counts_shm)
+        item_counts_spec = (item_counts_shm.name, item_counts.shape, item_counts.dtype)
+    try:
+        # 每个worker分到几段，便于负载均衡
+        slice_size = max(1, -(-data_num // (workers * 4)))
+        initargs = (multiprocessing.Value('i', 0),
+                    (offsets_shm.name, offsets.shape, offsets.dtype),
+                    (items_shm.name, items.shape, items.dtype),
+                    (counts_shm.name, counts.shape, counts.dtype),
+                    item_counts_spec, list(tables), item_mask, list(filters))
+        with ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=initargs) as executor:
+            futures = [executor.submit(countSlice, start, min(data_num, start + slice_size), chunk_size)
+                       for start in range(0, data_num, slice_size)]
+            for future in futures:
+                future.result()
+        # uint32按模2^32相加，与单进程的计数相同
+        total_counts = counts.sum(axis=0, dtype=np.uint32)
+        bucket_counts = list()
+        position = 0
+        for buckets_len, hash_func in tables:
+            bucket_counts.append(total_counts[position:position + buckets_len])
+            position += buckets_len
+        if item_counts is not None:
+            item_counts = item_counts.sum(axis=0)
+        return item_counts, bucket_counts, data_num
+    finally:
+        del offsets, items, counts
+        item_counts = None
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+
+def test(workers=4):
+    """
+    比较单进程与多进程的计数，包括同一事务内有重复项目的数据集
+    """
+    from PCY.pcy import loadDataSet, makeIndex, getHashCode
+    min_support = 0.005
+    data_set, index2data = makeIndex(loadDataSet())
+    # 每个事务重复前两个项目，重复的项目组成的项目对也要hash到桶中
+    duplicated_data_set = [t + t[:2] for t in data_set]
+    tables = [(20, getHashCode), (1000, hashFamily.createHash('murmur', 1))]
+    for name, indexed_data_set in (('groceries', data_set), ('duplicated', duplicated_data_set)):
+        serial = bucketCounter.countFirstPass(indexed_data_set, tables)
+        parallel = countFirstPass(indexed_data_set, tables, workers)
+        same = np.array_equal(serial[0], parallel[0]) and serial[2] == parallel[2]
+        same = same and all(np.array_equal(x, y) for x, y in zip(serial[1], parallel[1]))
+        print(name + " first pass equal:\t" + str(same))
+        support_data = dict()
+        L1 = bucketCounter.frequentItems(serial[0], serial[2], min_support, support_data)
+        item_mask = bucketCounter.itemMask(L1, len(serial[0]))
+        filters = [(tables[0][0], tables[0][1], bucketCounter.frequentBuckets(serial[1][0], serial[2], min_support))]
+        serial = countPairBuckets(indexed_data_set, tables[1:], 1, item_mask, filters)
+        parallel = countPairBuckets(indexed_data_set, tables[1:], workers, item_mask, filters)
+        same = all(np.array_equal(x, y) for x, y in zip(serial, parallel))
+        print(name + " second pass equal:\t" + str(same))
+        print(name + " bucket mass:\t" + str(int(serial[0].sum())))
+
+
+if __name__ == "__main__":
+    test()
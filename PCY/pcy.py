@@ -1,5 +1,18 @@
-import itertools
 import csv
+import os
+import sys
+import time
+
+if __name__ == "__main__":
+    # 在PCY目录中直接运行(python pcy.py)时，把仓库根目录加到sys.path，使from PCY import ...可用
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PCY import bucketCounter
+from PCY import candidateTrie
+from PCY import hashFamily
+from PCY import instrument
+from PCY import parallelCounter
+from PCY import transactionStore
 
 
 def loadDataSet():
@@ -52,7 +65,20 @@ def resumeDataSet(indexed_data_set, index2data):
 
 
 def getHashCode(a, b, buckets_len):
-    return int((a * b) % buckets_len)
+    # 同时支持int与numpy数组
+    return (a * b) % buckets_len
+
+
+def getItemsetHashCode(items, buckets_len):
+    """
+    k项集的hash函数，用于3项集及以上的桶过滤
+    :param items: 排好序的项目tuple
+    :param buckets_len: 桶的数量
+    """
+    hash_code = 0
+    for item in items:
+        hash_code = (hash_code * 1000003 + item + 1) % hashFamily.PRIME31
+    return hash_code % buckets_len
 
 
 def createC1(data_set):
@@ -63,37 +89,38 @@ def createC1(data_set):
     """
 
     C1 = set()
-    for t in data_set:
+    for t in transactionStore.iterTransactions(data_set):
         for item in t:
             # 生成不可变set，使得可被其它set加入作为元素
-            item_set = frozenset([item])
+            item_set = frozenset([int(item)])
             # 为生成频繁项目集时扫描数据库时以提供issubset()功能
             C1.add(item_set)
     return C1
 
 
-def generateC2(data_set, L1, vector, buckets_len):
+def generateC2Keys(data_set, L1, vector, buckets_len, hash_func=getHashCode, filter_counts=None):
     """
-    生成候选频繁2项集
+    生成候选频繁2项集：频繁1项集表示成以项目索引为下标的bool数组，事务先过滤掉不频繁的项目再枚举项目对，
+    项目对编码成int64(较小者 << 32 | 较大者)
     :param data_set:数据集
     :param L1:频繁1项集
     :param vector:buckets对应的vector
     :param buckets_len:桶的个数
-    :return:候选频繁2项集
+    :param hash_func:hash函数，与生成vector时使用的相同
+    :param filter_counts:传入dict时，写入被频繁项目与bitmap过滤掉的项目对个数
+    :return:排好序的项目对编码数组
     """
+    filters = [(buckets_len, hash_func, bucketCounter.unpackVector(vector, buckets_len))]
+    return bucketCounter.candidatePairKeys(data_set, bucketCounter.itemMask(L1), filters,
+                                           filter_counts=filter_counts)
 
-    C2 = set()
-    for t in data_set:
-        for pair in itertools.combinations(t, 2):
-            a = frozenset([pair[0]])
-            b = frozenset([pair[1]])
-            if a not in L1 or b not in L1:
-                continue
-            hash_code = getHashCode(pair[0], pair[1], buckets_len)
-            if vector & (1 << hash_code) == 0:
-                continue
-            C2.add(frozenset([pair[0], pair[1]]))
-    return C2
+
+def generateC2(data_set, L1, vector, buckets_len, hash_func=getHashCode):
+    """
+    生成候选频繁2项集
+    :return:候选频繁2项集，frozenset构成的set
+    """
+    return bucketCounter.keysToItemsets(generateC2Keys(data_set, L1, vector, buckets_len, hash_func))
 
 
 def generateLkByCk(data_set, Ck, min_support, support_data):
@@ -107,15 +134,8 @@ def generateLkByCk(data_set, Ck, min_support, support_data):
     """
 
     Lk = set()
-    # 通过dict记录候选频繁k项集的事务支持个数
-    item_count = {}
-    for t in data_set:
-        for Ck_item in Ck:
-            if Ck_item.issubset(t):
-                if Ck_item not in item_count:
-                    item_count[Ck_item] = 1
-                else:
-                    item_count[Ck_item] += 1
+    # 候选集构造成前缀树，每个事务只沿树走一遍，通过dict记录候选频繁k项集的事务支持个数
+    item_count = candidateTrie.countSupport(data_set, Ck)
     data_num = float(len(data_set))
     for item in item_count:
         if (item_count[item] / data_num) >= min_support:
@@ -124,47 +144,49 @@ def generateLkByCk(data_set, Ck, min_support, support_data):
     return Lk
 
 
-def generateVector(data_set, buckets_len, min_support):
+def generateVector(data_set, buckets_len, min_support, packed=False, hash_func=getHashCode, workers=None):
     """
     生成vector，第i位上为1表示对应的bucket是frequent的
+    按块向量化枚举项目对并hash，原地累加到桶计数中
     :param data_set:索引化后的数据集
     :param buckets_len:桶的数量
     :param min_support:support阈值
-    :return:vector (type int)
+    :param packed:True返回packbits后的uint8数组，桶很多时更紧凑
+    :param hash_func:hash函数f(a, b, buckets_len)，见hashFamily.createHash
+    :param workers:大于1时用多进程计数，结果与单进程相同
+    :return:vector (type int，或packbits后的数组)
     """
-    buckets = dict()
-    vector = int(0)
-    # 初始化hashtable
-    for i in range(0, buckets_len):
-        buckets[i] = 0
-    for t in data_set:
-        for pair in itertools.combinations(t, 2):
-            hash_code = getHashCode(int(pair[0]), int(pair[1]), buckets_len)
-            buckets[hash_code] += 1
-    data_num = float(len(data_set))
-    for index, val in buckets.items():
-        if (val / data_num) >= min_support:
-            vector |= (1 << index)
-    return vector
+    if workers is not None and workers > 1:
+        counts = parallelCounter.countPairBuckets(data_set, [(buckets_len, hash_func)], workers)[0]
+        return bucketCounter.countsToVector(counts, len(data_set), min_support, packed)
+    return bucketCounter.generateVector(data_set, buckets_len, min_support, hash_func, packed)
 
 
-def firstPass(data_set, buckets_len, min_support):
+def firstPass(data_set, buckets_len, min_support, packed=False, hash_func=getHashCode, workers=None, hook=None):
     """
     first pass，返回频繁1项集L1，vector与support_data
     :param data_set:
     :param buckets_len:
     :param min_support:
+    :param packed:vector是否使用packbits后的数组
+    :param hash_func:hash函数
+    :param workers:大于1时用多进程计数
+    :param hook:接收统计事件的函数，见instrument.emit
     :return:L1, vector, support_data
     """
-    C1 = createC1(data_set)
+    start = time.time()
+    # 只扫描一遍，同时统计项目计数与桶计数
+    item_counts, bucket_counts, data_num = parallelCounter.countFirstPass(data_set, [(buckets_len, hash_func)], workers)
     support_data = dict()
-    # 这里只是把support_data的引用传过去
-    L1 = generateLkByCk(data_set, C1, min_support, support_data)
-    vector = generateVector(data_set, buckets_len, min_support)
+    L1 = bucketCounter.frequentItems(item_counts, data_num, min_support, support_data)
+    vector = bucketCounter.countsToVector(bucket_counts[0], data_num, min_support, packed)
+    instrument.emit(hook, 'pcy_first_pass', start, k=1, items=int((item_counts > 0).sum()), frequent=len(L1),
+                    buckets_len=buckets_len, frequent_buckets=bucketCounter.frequentBucketCount(vector))
     return L1, vector, support_data
 
 
-def secondPass(data_set, L1, vector, support_data, buckets_len, min_support):
+def secondPass(data_set, L1, vector, support_data, buckets_len, min_support, hash_func=getHashCode,
+               filter_stats=None, hook=None):
     """
     second pass，返回频繁2项集
     :param data_set: 数据集
@@ -173,25 +195,43 @@ def secondPass(data_set, L1, vector, support_data, buckets_len, min_support):
     :param support_data: 项目集-支持度dict
     :param buckets_len: buckets个数
     :param min_support: support阈值
+    :param hash_func: hash函数，与first pass相同
+    :param filter_stats: 传入dict时，写入bucket过滤的统计(frequent桶个数、误报率等)
+    :param hook: 接收统计事件的函数，传入时额外统计每级过滤掉的项目对个数
     :return:
     """
-    C2 = generateC2(data_set, L1, vector, buckets_len)
-    L2 = generateLkByCk(data_set, C2, min_support, support_data)
+    start = time.time()
+    filter_counts = dict() if hook is not None else None
+    C2_keys = generateC2Keys(data_set, L1, vector, buckets_len, hash_func, filter_counts)
+    counts = bucketCounter.countCandidatePairs(data_set, C2_keys, bucketCounter.itemMask(L1))
+    L2 = bucketCounter.frequentPairs(C2_keys, counts, len(data_set), min_support, support_data)
+    if filter_stats is not None:
+        filter_stats.update(bucketCounter.filterStats(C2_keys, L2, [(vector, buckets_len)]))
+    if hook is not None:
+        instrument.emit(hook, 'pcy_second_pass', start, k=2, candidates=len(C2_keys), frequent=len(L2),
+                        **filter_counts)
     return L2
 
 
-def test():
+def test(hook=None):
     buckets_len = 20
+    # 按内存预算确定桶数
+    # buckets_len = hashFamily.bucketsForMemory('512MB')
+    hash_func = getHashCode
+    # hash_func = hashFamily.createHash('murmur')
     min_support = 0.005
     data_set = loadDataSet()
     indexed_data_set, index2data = makeIndex(data_set)
-    L1, vector, support_data = firstPass(indexed_data_set, buckets_len, min_support)
-    L2 = secondPass(indexed_data_set, L1, vector, support_data, buckets_len, min_support)
+    L1, vector, support_data = firstPass(indexed_data_set, buckets_len, min_support, hash_func=hash_func, hook=hook)
+    filter_stats = dict()
+    L2 = secondPass(indexed_data_set, L1, vector, support_data, buckets_len, min_support, hash_func, filter_stats, hook)
     L2_data = resumeDataSet(list(L2), index2data)
     for term in L2_data:
         print(term)
     print(str(len(L2_data)))
+    print("frequent buckets:\t" + str(filter_stats['frequent_buckets'][0]) + "/" + str(buckets_len))
+    print("false positive rate:\t" + str(filter_stats['false_positive_rate']))
 
 
 if __name__ == "__main__":
-    test()
+    instrument.runMain(test)
@@ -0,0 +1,160 @@
+import os
+import sys
+import numpy as np
+
+if __name__ == "__main__":
+    # 与pcy.py相同，支持在PCY目录中直接运行
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PCY import bucketCounter
+from PCY import hashFamily
+from PCY.pcy import loadDataSet, makeIndex, resumeDataSet
+
+
+class HashTable(object):
+    """
+    一个hash表：桶的数量与hash函数
+    """
+
+    def __init__(self, buckets_len, hash_func=None):
+        """
+        :param buckets_len: 桶的数量
+        :param hash_func: hash函数f(a, b, buckets_len)，默认与pcy.getHashCode相同
+        """
+        self.buckets_len = buckets_len
+        self.hash_func = hash_func if hash_func is not None else hashFamily.ProductHash()
+
+
+def plainStages(buckets_len, hash_func=None):
+    """
+    普通PCY：只有一个stage，一个hash表
+    """
+    return [[HashTable(buckets_len, hash_func)]]
+
+
+def multiHashStages(tables):
+    """
+    Multihash：一个stage中同时使用多个hash表
+    :param tables: HashTable list
+    """
+    return [list(tables)]
+
+
+def multiStageStages(tables):
+    """
+    Multistage：每个stage一个hash表，后面的stage只hash通过前面所有bitmap的项目对
+    :param tables: HashTable list
+    """
+    return [[table] for table in tables]
+
+
+def countKeys(keys_list):
+    """
+    合并多块的(项目对编码, 计数)
+    :param keys_list: (keys, counts)的list
+    :return: 去重后的keys, counts
+    """
+    if not keys_list:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    keys = np.concatenate([keys for keys, counts in keys_list])
+    counts = np.concatenate([counts for keys, counts in keys_list])
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return unique_keys, np.bincount(inverse, weights=counts, minlength=len(unique_keys)).astype(np.int64)
+
+
+def stagePass(data_set, tables, item_mask, filters):
+    """
+    扫描一遍数据集，将通过过滤的项目对hash到本stage的所有hash表中
+    :param data_set: 索引化后的数据集
+    :param tables: 本stage的HashTable list
+    :param item_mask: 频繁项目的bool数组
+    :param filters: 之前stage的(桶的数量, hash函数, frequent bool数组) list
+    :return: 每个hash表的桶计数list
+    """
+    bucket_counts = [np.zeros(table.buckets_len, dtype=np.uint32) for table in tables]
+    for offsets, items in bucketCounter.iterCsrChunks(data_set):
+        a, b = bucketCounter.chunkCandidatePairs(offsets, items, item_mask, filters)
+        if len(a) == 0:
+            continue
+        for table, counts in zip(tables, bucket_counts):
+            bucketCounter.addBucketCounts(counts, table.hash_func(a, b, table.buckets_len))
+    return bucket_counts
+
+
+def runPcy(data_set, stages, min_support):
+    """
+    通用PCY：按stages配置依次扫描，每个stage的bitmap作为之后所有stage的过滤条件，最后一遍统计C2
+    plainStages为普通PCY，multiHashStages为Multihash，multiStageStages为Multistage，也可以自由组合
+    :param data_set: 索引化后的数据集
+    :param stages: stage list，每个stage为HashTable list
+    :param min_support: support阈值
+    :return: L1, L2, support_data, vectors(每个stage中每个hash表的packbits后的bitmap)
+    """
+    if len(stages) == 0:
+        raise ValueError("at least one stage is required")
+    support_data = dict()
+    filters = list()
+    vectors = list()
+    # stage 0与项目计数合并为一遍扫描
+    item_counts, bucket_counts, data_num = bucketCounter.countFirstPass(
+        data_set, [(table.buckets_len, table.hash_func) for table in stages[0]])
+    L1 = bucketCounter.frequentItems(item_counts, data_num, min_support, support_data)
+    item_mask = bucketCounter.itemMask(L1, len(item_counts))
+    for stage_index, tables in enumerate(stages):
+        if stage_index > 0:
+            bucket_counts = stagePass(data_set, tables, item_mask, filters)
+        stage_vectors = list()
+        for table, bucket_count in zip(tables, bucket_counts):
+            frequent = bucketCounter.frequentBuckets(bucket_count, data_num, min_support)
+            filters.append((table.buckets_len, table.hash_func, frequent))
+            stage_vectors.append(bucketCounter.packVector(frequent))
+        vectors.append(stage_vectors)
+    # 最后一遍：通过所有过滤的项目对就是C2，直接计数
+    keys_list = list()
+    for offsets, items in bucketCounter.iterCsrChunks(data_set):
+        offsets, items = bucketCounter.maskChunk(offsets, items, item_mask)
+        # 同一事务内重复的项目只算一次
+        offsets, items = bucketCounter.uniqueRows(offsets, items)
+        a, b = bucketCounter.chunkCandidatePairs(offsets, items, None, filters)
+        keys, counts = np.unique(bucketCounter.pairKeys(a, b), return_counts=True)
+        keys_list.append((keys, counts))
+        if len(keys_list) >= 16:
+            keys_list = [countKeys(keys_list)]
+    keys, counts = countKeys(keys_list)
+    L2 = set()
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        if (count / float(data_num)) >= min_support:
+            item_set = frozenset([key >> 32, key & 0xFFFFFFFF])
+            L2.add(item_set)
+            support_data[item_set] = count / float(data_num)
+    return L1, L2, support_data, vectors
+
+
+def test():
+    min_support = 0.005
+    # 普通PCY
+    stages = plainStages(20)
+    # Multihash
+    # stages = multiHashStages([HashTable(20, hashFamily.ProductHash()), HashTable(20, hashFamily.SumHash())])
+    # Multistage
+    # stages = multiStageStages([HashTable(20, hashFamily.ProductHash()), HashTable(20, hashFamily.SumHash())])
+    # 两个stage，每个stage两个hash表
+    # stages = [[HashTable(1 << 16, hashFamily.createHash('murmur', seed=1)),
+    #            HashTable(1 << 16, hashFamily.createHash('murmur', seed=2))],
+    #           [HashTable(1 << 16, hashFamily.createHash('murmur', seed=3)),
+    #            HashTable(1 << 16, hashFamily.createHash('murmur', seed=4))]]
+    data_set = loadDataSet()
+    indexed_data_set, index2data = makeIndex(data_set)
+    L1, L2, support_data, vectors = runPcy(indexed_data_set, stages, min_support)
+    L2_data = resumeDataSet(list(L2), index2data)
+    for term in L2_data:
+        print(term)
+    print(str(len(L2_data)))
+    for stage_index, (tables, stage_vectors) in enumerate(zip(stages, vectors)):
+        print("stage %d frequent buckets:\t%s" % (stage_index, [
+            "%d/%d" % (bucketCounter.frequentBucketCount(vector), table.buckets_len)
+            for table, vector in zip(tables, stage_vectors)]))
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,126 @@
+import numpy as np
+from PCY import transactionStore
+
+
+def popCount(bitmap):
+    """
+    统计位图中1的个数
+    :param bitmap: 位图 (type int)
+    :return: 1的个数
+    """
+    return bin(bitmap).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    # python3.10以上直接使用内置的popcount
+    def popCount(bitmap):
+        return bitmap.bit_count()
+
+
+def createItemBitmapsFromStore(store):
+    """
+    由CSR布局的TransactionStore直接生成每个项目的事务id位图
+    :param store: TransactionStore
+    :return: 项目-位图dict, 事务个数
+    """
+    data_num = len(store)
+    items = store.rowItems()
+    row_ids = store.rowIds()
+    # 按项目排序后，每个项目的事务下标是连续的一段
+    order = np.argsort(items, kind='stable')
+    sorted_items = items[order]
+    sorted_rows = row_ids[order]
+    boundaries = np.flatnonzero(np.diff(sorted_items)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(sorted_items)]))
+    item_bitmaps = dict()
+    bytes_len = (data_num + 7) // 8
+    for start, end in zip(starts, ends):
+        if start == end:
+            continue
+        tids = sorted_rows[start:end]
+        buf = np.zeros(bytes_len, dtype=np.uint8)
+        np.bitwise_or.at(buf, tids >> 3, (1 << (tids & 7)).astype(np.uint8))
+        item_bitmaps[int(sorted_items[start])] = int.from_bytes(buf.tobytes(), 'little')
+    return item_bitmaps, data_num
+
+
+def createItemBitmaps(data_set):
+    """
+    按垂直布局生成每个项目的事务id位图，第tid位为1表示第tid个事务包含该项目
+    :param data_set: 索引化后的数据集
+    :return: 项目-位图dict, 事务个数
+    """
+    if isinstance(data_set, transactionStore.TransactionStore):
+        return createItemBitmapsFromStore(data_set)
+    item_tids = dict()
+    data_num = 0
+    for tid, t in enumerate(data_set):
+        for item in t:
+            item = int(item)
+            if item not in item_tids:
+                item_tids[item] = list()
+            item_tids[item].append(tid)
+        data_num = tid + 1
+    item_bitmaps = dict()
+    bytes_len = (data_num + 7) // 8
+    for item, tids in item_tids.items():
+        # 先在bytearray上置位，再一次性转换成int，避免大整数反复 |= 的开销
+        buf = bytearray(bytes_len)
+        for tid in tids:
+            buf[tid >> 3] |= 1 << (tid & 7)
+        item_bitmaps[item] = int.from_bytes(bytes(buf), 'little')
+    return item_bitmaps, data_num
+
+
+class TidBitmapIndex(object):
+    """
+    垂直布局的支持度计数引擎
+    k项集的支持度为其(k-1)前缀位图与第k个项目位图相与后的popcount，
+    频繁项集的位图缓存下来，作为下一层候选集的前缀位图
+    """
+
+    def __init__(self, data_set):
+        self.item_bitmaps, self.data_num = createItemBitmaps(data_set)
+        self.full_bitmap = (1 << self.data_num) - 1
+        # 排序后的项集tuple-位图dict，只保留最近一层，控制内存
+        self.prefix_cache = dict()
+
+    def getBitmap(self, items):
+        """
+        求项集的事务id位图，前缀不在缓存中时递归求出并缓存
+        :param items: 排好序的项集tuple
+        :return: 位图 (type int)
+        """
+        if len(items) == 0:
+            return self.full_bitmap
+        if len(items) == 1:
+            return self.item_bitmaps.get(items[0], 0)
+        if items in self.prefix_cache:
+            return self.prefix_cache[items]
+        bitmap = self.getBitmap(items[:-1]) & self.item_bitmaps.get(items[-1], 0)
+        self.prefix_cache[items] = bitmap
+        return bitmap
+
+    def generateLkByCk(self, Ck, min_support, support_data):
+        """
+        将不满足支持度的项集删除，由候选频繁k项集生成频繁k项集
+        :param Ck: 候选频繁k项集
+        :param min_support: 最小支持度
+        :param support_data: 项目集-支持度dict
+        :return: 频繁k项集
+        """
+        Lk = set()
+        level_cache = dict()
+        data_num = float(self.data_num)
+        for Ck_item in Ck:
+            items = tuple(sorted(Ck_item))
+            bitmap = self.getBitmap(items[:-1]) & self.item_bitmaps.get(items[-1], 0)
+            count = popCount(bitmap)
+            if count > 0 and (count / data_num) >= min_support:
+                Lk.add(Ck_item)
+                support_data[Ck_item] = count / data_num
+                level_cache[items] = bitmap
+        # 本层频繁项集的位图即下一层候选集的前缀位图
+        self.prefix_cache = level_cache
+        return Lk
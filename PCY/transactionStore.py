@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class TransactionStore(object):
+    """
+    CSR布局的索引化事务集，第i个事务为items[offsets[i]:offsets[i + 1]]
+    所有事务共用一个int32的items数组，切片只截取offsets，不复制items
+    """
+
+    def __init__(self, offsets, items, index2data=None):
+        """
+        :param offsets: 每个事务在items中的起始位置，长度为事务个数+1
+        :param items: 所有事务的项目索引依次拼接而成的数组
+        :param index2data: index-data dict
+        """
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.items = np.asarray(items, dtype=np.int32)
+        self.index2data = index2data if index2data is not None else dict()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        items = self.items
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield items[offsets[i]:offsets[i + 1]]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                return TransactionStore(self.offsets[start:stop + 1], self.items, self.index2data)
+            rows = [self[i] for i in range(start, stop, step)]
+            return fromIndexed(rows, self.index2data)
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("transaction index out of range")
+        return self.items[self.offsets[index]:self.offsets[index + 1]]
+
+    def __reduce__(self):
+        # 序列化时只保存切片实际用到的部分
+        store = self.compact()
+        return TransactionStore, (store.offsets, store.items, store.index2data)
+
+    def compact(self):
+        """
+        生成offsets从0开始、items只包含本事务集的副本
+        :return: TransactionStore
+        """
+        begin = self.offsets[0]
+        end = self.offsets[-1]
+        return TransactionStore(self.offsets - begin, self.items[begin:end].copy(), self.index2data)
+
+    def rowItems(self):
+        """
+        :return: 本事务集用到的items数组(视图)
+        """
+        return self.items[self.offsets[0]:self.offsets[-1]]
+
+    def rowLengths(self):
+        """
+        :return: 每个事务的项目个数
+        """
+        return np.diff(self.offsets)
+
+    def rowIds(self):
+        """
+        :return: 与rowItems()等长的数组，表示每个项目所属的事务下标
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.rowLengths())
+
+    def itemsLen(self):
+        """
+        :return: 项目索引的上界，即最大项目索引+1
+        """
+        items = self.rowItems()
+        if len(items) == 0:
+            return len(self.index2data)
+        return max(int(items.max()) + 1, len(self.index2data))
+
+    def iterLists(self):
+        """
+        逐个返回事务的list形式，每次只转换一行
+        """
+        for row in self:
+            yield row.tolist()
+
+
+def iterTransactions(data_set):
+    """
+    逐个返回事务，TransactionStore按行转换成list，其余数据集原样返回
+    :param data_set: 数据库事务集
+    """
+    if isinstance(data_set, TransactionStore):
+        return data_set.iterLists()
+    return iter(data_set)
+
+
+def fromIndexed(indexed_data_set, index2data=None, sort_rows=False):
+    """
+    由makeIndex得到的list of list生成TransactionStore
+    :param indexed_data_set: 索引化后的数据集
+    :param index2data: index-data dict
+    :param sort_rows: 是否将每个事务内的项目排序
+    :return: TransactionStore
+    """
+    lengths = list()
+    flat_items = list()
+    for t in indexed_data_set:
+        t = [int(item) for item in t]
+        if sort_rows:
+            t.sort()
+        lengths.append(len(t))
+        flat_items.extend(t)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return TransactionStore(offsets, np.array(flat_items, dtype=np.int32), index2data)
+
+
+def makeStore(data_set, sort_rows=True):
+    """
+    格式化数据集，将其元素用索引表示，索引从0开始，直接生成CSR布局的TransactionStore
+    :param data_set: 原数据集
+    :param sort_rows: 是否将每个事务内的项目排序
+    :return: TransactionStore, index-data dict
+    """
+    data2index = dict()
+    index2data = dict()
+    lengths = list()
+    flat_items = list()
+    for t in data_set:
+        for item in t:
+            if item not in data2index:
+                cur_index = len(data2index)
+                data2index[str(item)] = int(cur_index)
+                index2data[int(cur_index)] = str(item)
+            flat_items.append(data2index[str(item)])
+        lengths.append(len(t))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    items = np.array(flat_items, dtype=np.int32)
+    store = TransactionStore(offsets, items, index2data)
+    if sort_rows and len(items) > 0:
+        # 按(事务下标, 项目索引)排序，即每个事务内部排序
+        order = np.lexsort((items, store.rowIds()))
+        store.items = items[order]
+    return store, index2data
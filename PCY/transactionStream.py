@@ -0,0 +1,160 @@
+import csv
+import os
+import numpy as np
+
+# 二进制溢写文件中每块的头部：事务个数, 项目总数
+CHUNK_HEADER = np.dtype([('rows', '<i8'), ('items', '<i8')])
+
+
+def parseItems(term):
+    """
+    解析Groceries.csv中的一行，与loadDataSet相同，取第二列"{a,b,c}"中的项目
+    :param term: csv的一行
+    :return: 项目list
+    """
+    return term[1][1:-1].split(',')
+
+
+class TransactionStream(object):
+    """
+    流式事务源，按块读取Groceries.csv格式的文件，每次迭代重新扫描一遍，不在内存中保存整个数据集
+    第一遍扫描时可将索引化后的事务溢写到二进制文件，之后的扫描直接读二进制文件，不再解析csv
+    """
+
+    def __init__(self, path, chunk_size=10000, spill_path=None, skip_header=False):
+        """
+        :param path: csv文件路径
+        :param chunk_size: 每块的事务个数
+        :param spill_path: 二进制溢写文件路径，None表示不溢写
+        :param skip_header: 是否跳过表头，默认与loadDataSet一样把表头也当作一个事务
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.spill_path = spill_path
+        self.skip_header = skip_header
+        self.data2index = dict()
+        self.index2data = dict()
+        self.data_num = None
+        self.spilled = False
+        self.spilling = False
+        self.scans = 0
+
+    def __len__(self):
+        if self.data_num is None:
+            # 事务个数未知时先扫描一遍
+            for _ in self.iterChunks():
+                pass
+        return self.data_num
+
+    def __iter__(self):
+        for chunk in self.iterChunks():
+            for t in chunk:
+                yield t
+
+    def iterChunks(self):
+        """
+        逐块返回索引化后的事务list
+        """
+        for offsets, items in self.iterCsrChunks():
+            offsets = offsets.tolist()
+            items = items.tolist()
+            yield [items[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def iterCsrChunks(self):
+        """
+        逐块返回CSR布局的事务，即(offsets, items)两个数组
+        """
+        self.scans += 1
+        if self.spilled:
+            return self.readSpill()
+        return self.parseCsv()
+
+    def indexChunk(self, chunk):
+        """
+        将一块原始事务索引化成CSR布局
+        :param chunk: 项目list的list
+        :return: offsets, items
+        """
+        lengths = list()
+        flat_items = list()
+        for t in chunk:
+            for item in t:
+                if item not in self.data2index:
+                    cur_index = len(self.data2index)
+                    self.data2index[item] = cur_index
+                    self.index2data[cur_index] = item
+                flat_items.append(self.data2index[item])
+            lengths.append(len(t))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return offsets, np.array(flat_items, dtype=np.int32)
+
+    def parseCsv(self):
+        """
+        解析csv，按块返回CSR布局的事务，需要时同时写溢写文件
+        """
+        spill_file = None
+        if self.spill_path is not None and not self.spilling:
+            self.spilling = True
+            spill_file = open(self.spill_path + '.tmp', 'wb')
+        data_num = 0
+        try:
+            with open(self.path, 'r') as f:
+                reader = csv.reader(f)
+                if self.skip_header:
+                    next(reader, None)
+                chunk = list()
+                for term in reader:
+                    chunk.append(parseItems(term))
+                    if len(chunk) >= self.chunk_size:
+                        offsets, items = self.indexChunk(chunk)
+                        data_num += len(chunk)
+                        chunk = list()
+                        if spill_file is not None:
+                            self.writeChunk(spill_file, offsets, items)
+                        yield offsets, items
+                if chunk:
+                    offsets, items = self.indexChunk(chunk)
+                    data_num += len(chunk)
+                    if spill_file is not None:
+                        self.writeChunk(spill_file, offsets, items)
+                    yield offsets, items
+            self.data_num = data_num
+            if spill_file is not None:
+                spill_file.close()
+                os.replace(self.spill_path + '.tmp', self.spill_path)
+                self.spilled = True
+        finally:
+            if spill_file is not None:
+                self.spilling = False
+                if not spill_file.closed:
+                    # 扫描中途结束，丢弃不完整的溢写文件
+                    spill_file.close()
+                    os.remove(self.spill_path + '.tmp')
+
+    @staticmethod
+    def writeChunk(spill_file, offsets, items):
+        """
+        写一块到溢写文件：头部, 每个事务的长度(int32), 项目(int32)
+        """
+        header = np.array([(len(offsets) - 1, len(items))], dtype=CHUNK_HEADER)
+        header.tofile(spill_file)
+        np.diff(offsets).astype('<i4').tofile(spill_file)
+        items.astype('<i4').tofile(spill_file)
+
+    def readSpill(self):
+        """
+        读溢写文件，按块返回CSR布局的事务
+        """
+        with open(self.spill_path, 'rb') as f:
+            while True:
+                header = np.fromfile(f, dtype=CHUNK_HEADER, count=1)
+                if len(header) == 0:
+                    break
+                rows = int(header[0]['rows'])
+                items_len = int(header[0]['items'])
+                lengths = np.fromfile(f, dtype='<i4', count=rows)
+                offsets = np.zeros(rows + 1, dtype=np.int64)
+                np.cumsum(lengths, out=offsets[1:])
+                items = np.fromfile(f, dtype='<i4', count=items_len).astype(np.int32)
+                yield offsets, items
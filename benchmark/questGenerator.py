@@ -0,0 +1,147 @@
+import math
+import random
+import numpy as np
+
+
+def poisson(rng, mean):
+    """
+    生成泊松分布的随机数(Knuth算法)，mean较大时用正态近似
+    """
+    if mean > 30:
+        return max(0, int(round(rng.gauss(mean, math.sqrt(mean)))))
+    limit = math.exp(-mean)
+    k = 0
+    p = rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def createPatterns(rng, items_num, patterns_num, avg_pattern_len, correlation=0.5):
+    """
+    生成潜在的频繁模式：每个模式的项数服从泊松分布，一部分项目取自上一个模式，
+    每个模式有一个指数分布的权重(被选中的概率)和一个正态分布的损坏程度
+    :param rng: random.Random
+    :param items_num: 项目个数
+    :param patterns_num: 模式个数
+    :param avg_pattern_len: 模式的平均项数
+    :param correlation: 从上一个模式中取项目的平均比例
+    :return: 模式list，每个元素为(项目list, 累积权重, 损坏程度)
+    """
+    patterns = list()
+    weights = list()
+    previous = list()
+    for _ in range(patterns_num):
+        length = min(items_num, max(1, poisson(rng, avg_pattern_len)))
+        items = set()
+        if previous:
+            reuse = min(len(previous), int(round(length * min(1.0, rng.expovariate(1.0 / correlation)))))
+            items.update(rng.sample(previous, reuse))
+        while len(items) < length:
+            items.add(rng.randrange(items_num))
+        previous = sorted(items)
+        patterns.append(previous)
+        weights.append(rng.expovariate(1.0))
+    total = sum(weights)
+    cumulative = 0.0
+    result = list()
+    for items, weight in zip(patterns, weights):
+        cumulative += weight / total
+        corruption = min(1.0, max(0.0, rng.gauss(0.5, 0.1)))
+        result.append((items, cumulative, corruption))
+    return result
+
+
+def pickPattern(rng, patterns):
+    """
+    按权重随机选择一个模式
+    """
+    target = rng.random()
+    low = 0
+    high = len(patterns) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if patterns[middle][1] < target:
+            low = middle + 1
+        else:
+            high = middle
+    return patterns[low]
+
+
+def generateTransactions(transactions_num, avg_width, items_num, patterns_num, avg_pattern_len=4, seed=0):
+    """
+    IBM Quest风格的合成购物篮数据：每个事务的项数服从泊松分布，由按权重选出的模式填充，
+    模式中的项目按损坏程度随机丢弃；装不下的模式一半概率照样加入，否则留给下一个事务
+    :param transactions_num: 事务个数
+    :param avg_width: 事务的平均项数
+    :param items_num: 项目个数
+    :param patterns_num: 模式个数
+    :param avg_pattern_len: 模式的平均项数
+    :param seed: 随机种子，相同的参数与种子生成相同的数据
+    :return: 索引化后的数据集(list of list)，项目索引从0开始
+    """
+    rng = random.Random(seed)
+    patterns = createPatterns(rng, items_num, patterns_num, avg_pattern_len)
+    data_set = list()
+    pending = None
+    for _ in range(transactions_num):
+        width = max(1, poisson(rng, avg_width))
+        t = set()
+        # 模式与事务中已有的项目重叠时可能加不进新项目，限制尝试次数
+        attempts = 0
+        while len(t) < width and attempts < 4 * width:
+            attempts += 1
+            if pending is not None:
+                items = pending
+                pending = None
+            else:
+                pattern_items, _, corruption = pickPattern(rng, patterns)
+                items = [item for item in pattern_items if rng.random() >= corruption]
+                if not items:
+                    continue
+            if len(t) + len(items) > width and t:
+                if rng.random() < 0.5:
+                    t.update(items)
+                else:
+                    pending = items
+                break
+            t.update(items)
+        data_set.append(sorted(t))
+    return data_set
+
+
+def saveDataSet(data_set, path):
+    """
+    以CSR布局(offsets, items)保存到.npz文件
+    :param data_set: 索引化后的数据集
+    :param path: 文件路径
+    """
+    lengths = [len(t) for t in data_set]
+    offsets = np.zeros(len(data_set) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    items = np.array([item for t in data_set for item in t], dtype=np.int32)
+    np.savez(path, offsets=offsets, items=items)
+
+
+def loadDataSet(path):
+    """
+    读取saveDataSet保存的数据集
+    :return: 索引化后的数据集(list of list)
+    """
+    with np.load(path) as f:
+        offsets = f['offsets'].tolist()
+        items = f['items'].tolist()
+    return [items[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def writeCsv(data_set, path):
+    """
+    写成与Groceries.csv相同的格式，便于用transactionStream等按文件读取的工具处理
+    :param data_set: 索引化后的数据集
+    :param path: 文件路径
+    """
+    with open(path, 'w') as f:
+        f.write('"","items"\n')
+        for index, t in enumerate(data_set):
+            f.write('"%d","{%s}"\n' % (index + 1, ','.join('item%d' % item for item in t)))
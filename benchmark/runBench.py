@@ -0,0 +1,199 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+# A-priori目录名中有'-'，不能作为包导入，与PyCharm中的配置一样把它和仓库根目录加到sys.path
+for path in (BENCH_DIR, ROOT_DIR, os.path.join(ROOT_DIR, 'A-priori')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import questGenerator
+
+MINERS = ['apriori', 'apriori_pcy', 'pcy', 'multihash', 'multistage']
+# 不使用桶的算法对每个min_support只运行一次
+BUCKET_MINERS = set(['apriori_pcy', 'pcy', 'multihash', 'multistage'])
+FIELDS = ['miner', 'min_support', 'buckets_len', 'max_k', 'transactions', 'avg_width', 'items', 'patterns',
+          'wall_time', 'peak_rss_kb', 'scans', 'frequent', 'levels']
+
+
+class ScanCounter(object):
+    """
+    包装数据集，统计被完整遍历的次数，作为扫描数据集次数的代理
+    """
+
+    def __init__(self, data_set):
+        self.data_set = data_set
+        self.scans = 0
+
+    def __len__(self):
+        return len(self.data_set)
+
+    def __getitem__(self, index):
+        return self.data_set[index]
+
+    def __iter__(self):
+        self.scans += 1
+        return iter(self.data_set)
+
+
+def runMiner(miner, data_set, min_support, buckets_len, max_k):
+    """
+    运行一个算法
+    :return: 每层的统计list(每个元素为{'k', 'candidates', 'frequent', ...}), 频繁项集个数
+    """
+    import Apriori
+    from PCY import pcy, MultiHash, MultiStage
+    level_stats = list()
+    if miner == 'apriori':
+        L, support_data = Apriori.generateL(data_set, max_k, min_support, level_stats=level_stats)
+    elif miner == 'apriori_pcy':
+        L, support_data = Apriori.generateLUsePcy(data_set, max_k, min_support, buckets_len=buckets_len,
+                                                  level_stats=level_stats)
+    elif miner == 'pcy':
+        L1, vector, support_data = pcy.firstPass(data_set, buckets_len, min_support, buckets_len > 64)
+        filter_stats = dict()
+        L2 = pcy.secondPass(data_set, L1, vector, support_data, buckets_len, min_support,
+                            filter_stats=filter_stats)
+        level_stats.append({'k': 2, 'candidates': filter_stats['candidates'], 'frequent': len(L2)})
+    elif miner == 'multihash':
+        L1, first_vector, second_vector, support_data = MultiHash.firstPass(data_set, buckets_len, buckets_len,
+                                                                            min_support)
+        filter_stats = dict()
+        L2 = MultiHash.secondPass(data_set, L1, first_vector, second_vector, support_data, buckets_len, buckets_len,
+                                  min_support, filter_stats=filter_stats)
+        level_stats.append({'k': 2, 'candidates': filter_stats['candidates'], 'frequent': len(L2)})
+    elif miner == 'multistage':
+        L1, first_vector, support_data = MultiStage.firstPass(data_set, buckets_len, min_support)
+        second_vector = MultiStage.secondPass(data_set, L1, first_vector, buckets_len, buckets_len, min_support)
+        filter_stats = dict()
+        L2 = MultiStage.thirdPass(data_set, L1, first_vector, second_vector, support_data, buckets_len, buckets_len,
+                                  min_support, filter_stats=filter_stats)
+        level_stats.append({'k': 2, 'candidates': filter_stats['candidates'], 'frequent': len(L2)})
+    else:
+        raise ValueError("unknown miner: %s" % miner)
+    if miner in ('pcy', 'multihash', 'multistage'):
+        L = [L1, L2]
+    return level_stats, sum(len(Lk) for Lk in L)
+
+
+def runChild(config):
+    """
+    子进程中运行一次，峰值内存只包括读取数据集与本次运行
+    :param config: dict，包括data_path, miner, min_support, buckets_len, max_k
+    :return: 结果dict
+    """
+    data_set = ScanCounter(questGenerator.loadDataSet(config['data_path']))
+    start = time.time()
+    # 算法本身的输出不计入结果
+    with contextlib.redirect_stdout(io.StringIO()):
+        level_stats, frequent = runMiner(config['miner'], data_set, config['min_support'], config['buckets_len'],
+                                         config['max_k'])
+    wall_time = time.time() - start
+    return {'wall_time': wall_time,
+            # Linux上ru_maxrss的单位为KB
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'scans': data_set.scans,
+            'frequent': frequent,
+            'levels': level_stats}
+
+
+def runGrid(args, data_path):
+    """
+    对所有算法、min_support、桶数的组合各启动一个子进程运行
+    :return: 结果list
+    """
+    results = list()
+    for miner in args.miners:
+        for min_support in args.supports:
+            buckets_list = args.buckets if miner in BUCKET_MINERS else [None]
+            for buckets_len in buckets_list:
+                config = {'data_path': data_path, 'miner': miner, 'min_support': min_support,
+                          'buckets_len': buckets_len, 'max_k': args.max_k}
+                output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child',
+                                                  json.dumps(config)])
+                result = {'miner': miner, 'min_support': min_support, 'buckets_len': buckets_len,
+                          'max_k': args.max_k, 'transactions': args.transactions, 'avg_width': args.avg_width,
+                          'items': args.items, 'patterns': args.patterns}
+                result.update(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+                print("%s\tmin_support=%s\tbuckets=%s\t%.3fs\t%dKB\tscans=%d" % (
+                    miner, min_support, buckets_len, result['wall_time'], result['peak_rss_kb'], result['scans']))
+                results.append(result)
+    return results
+
+
+def formatLevels(levels):
+    """
+    每层的统计写成'k:候选集个数/频繁集个数'，用';'分隔，便于写入CSV
+    """
+    return ';'.join('%d:%d/%d' % (stats['k'], stats['candidates'], stats['frequent']) for stats in levels)
+
+
+def writeResults(results, out):
+    """
+    写入out.json与out.csv
+    :param results: 结果list
+    :param out: 不带后缀的输出路径
+    """
+    with open(out + '.json', 'w') as f:
+        json.dump(results, f, indent=2)
+    with open(out + '.csv', 'w') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for result in results:
+            row = dict(result)
+            row['levels'] = formatLevels(result['levels'])
+            writer.writerow(row)
+
+
+def parseList(value, convert):
+    return [convert(item) for item in value.split(',') if item]
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="benchmark frequent itemset miners on synthetic baskets")
+    parser.add_argument('--transactions', type=int, default=10000)
+    parser.add_argument('--avg-width', type=float, default=10)
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--patterns', type=int, default=200)
+    parser.add_argument('--pattern-len', type=float, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--supports', type=lambda value: parseList(value, float), default=[0.01, 0.005])
+    parser.add_argument('--buckets', type=lambda value: parseList(value, int), default=[1000, 100000])
+    parser.add_argument('--max-k', type=int, default=3)
+    parser.add_argument('--miners', type=lambda value: parseList(value, str), default=MINERS)
+    parser.add_argument('--out', default='bench_results')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    for miner in args.miners:
+        if miner not in MINERS:
+            parser.error("unknown miner: %s" % miner)
+    return args
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    if args.child is not None:
+        print(json.dumps(runChild(json.loads(args.child))))
+        return
+    data_set = questGenerator.generateTransactions(args.transactions, args.avg_width, args.items, args.patterns,
+                                                   args.pattern_len, args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'baskets.npz')
+        questGenerator.saveDataSet(data_set, data_path)
+        results = runGrid(args, data_path)
+    writeResults(results, args.out)
+    print("results written to %s.csv and %s.json" % (args.out, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# 在一台机器上用多进程运行Hadoop Streaming风格的mapper/reducer脚本，代替"cat | mapper | sort | reducer"管道
+# map: 输入文件按行切分成若干块，每块启动一个mapper进程；mapper的输出按key(第一个\t之前的部分)的crc32分到各个reducer，
+#      缓冲超过内存上限时排序(可选地经过combiner)后写成spill文件
+# reduce: 每个reducer用heapq.merge把所有spill文件归并成有序的输入(文件多于--fan-in时先多趟归并)，输出写到part文件，
+#         最后按顺序拼接成output
+# 排序按整行的字节比较，与LC_ALL=C sort相同
+# usage:
+#   cd wordCount && python ../mapReduce/localRunner.py --mapper ./mapper.py --reducer ./reducer.py \
+#       --combiner ./reducer.py --input ../PCY/Groceries.csv --output word_count.txt
+#   cd pageRank && python ../mapReduce/localRunner.py --mapper ./IterMapper.py --reducer "./IterReducer.py 4" \
+#       --input pg_state.txt --output pg_state.txt.tmp --workers 4 --reducers 4
+import argparse
+import heapq
+import multiprocessing
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import zlib
+
+
+def parseMemory(memory):
+    """
+    解析内存大小，例如'64MB', '1G', 1048576
+    :return: 字节数
+    """
+    if isinstance(memory, int):
+        return memory
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*$', str(memory).upper())
+    if match is None:
+        raise ValueError("invalid memory size: %s" % memory)
+    units = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    return int(float(match.group(1)) * units[match.group(2)])
+
+
+def splitInput(paths, split_size):
+    """
+    将输入文件切分成按行对齐的块
+    :param paths: 输入文件list
+    :param split_size: 每块的大约字节数
+    :return: (path, start, end) list
+    """
+    splits = list()
+    for path in paths:
+        size = os.path.getsize(path)
+        start = 0
+        with open(path, 'rb') as f:
+            while start < size:
+                f.seek(min(start + split_size, size))
+                # 块的结尾移到下一个换行之后
+                f.readline()
+                end = min(f.tell(), size)
+                splits.append((path, start, end))
+                start = end
+    return splits
+
+
+def feedRange(stdin, path, start, end):
+    """
+    把文件[start, end)的内容写入子进程的stdin，在单独的线程中运行，避免与读取stdout互相阻塞
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(remaining, 1 << 20))
+                if not block:
+                    break
+                stdin.write(block)
+                remaining -= len(block)
+    finally:
+        stdin.close()
+
+
+def partition(line, reducers_num):
+    """
+    按key的crc32分区，没有\t时整行作为key
+    """
+    key = line.split(b'\t', 1)[0].rstrip(b'\r\n')
+    return zlib.crc32(key) % reducers_num
+
+
+def runCommand(command, records):
+    """
+    运行combiner，输入为排好序的记录list
+    :return: 排好序的输出记录list
+    """
+    proc = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    output, _ = proc.communicate(b''.join(records))
+    if proc.returncode != 0:
+        raise RuntimeError("%s exited with %d" % (command, proc.returncode))
+    # combiner可能改变key，重新排序
+    return sorted(output.splitlines(True))
+
+
+def spill(buffers, combiner, tmp_dir, task_index, spill_paths):
+    """
+    每个分区的缓冲排序后写成一个spill文件，并清空缓冲
+    :param buffers: 每个分区的记录list
+    :param combiner: combiner命令，为None时不合并
+    :param spill_paths: 每个分区的spill文件list，写入新的文件路径
+    """
+    for index, records in enumerate(buffers):
+        if not records:
+            continue
+        records.sort()
+        if combiner is not None:
+            records = runCommand(combiner, records)
+        path = os.path.join(tmp_dir, 'map-%05d-part-%05d-%d' % (task_index, index, len(spill_paths[index])))
+        with open(path, 'wb') as f:
+            f.writelines(records)
+        spill_paths[index].append(path)
+        buffers[index] = list()
+
+
+def runMapTask(task):
+    """
+    在worker进程中运行一个map任务
+    :param task: (任务编号, (path, start, end), mapper命令, combiner命令, reducer个数, 内存上限, 临时目录)
+    :return: 每个分区的spill文件list
+    """
+    task_index, (path, start, end), mapper, combiner, reducers_num, memory_limit, tmp_dir = task
+    proc = subprocess.Popen(shlex.split(mapper), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    feeder = threading.Thread(target=feedRange, args=(proc.stdin, path, start, end))
+    feeder.start()
+    buffers = [list() for _ in range(reducers_num)]
+    spill_paths = [list() for _ in range(reducers_num)]
+    buffered = 0
+    for line in proc.stdout:
+        if not line.endswith(b'\n'):
+            line += b'\n'
+        buffers[partition(line, reducers_num)].append(line)
+        buffered += len(line)
+        if buffered >= memory_limit:
+            spill(buffers, combiner, tmp_dir, task_index, spill_paths)
+            buffered = 0
+    spill(buffers, combiner, tmp_dir, task_index, spill_paths)
+    feeder.join()
+    if proc.wait() != 0:
+        raise RuntimeError("%s exited with %d" % (mapper, proc.returncode))
+    return spill_paths
+
+
+def mergeRuns(paths, output_path):
+    """
+    用heapq.merge把若干个有序的文件归并成一个有序的文件
+    """
+    files = [open(path, 'rb') for path in paths]
+    try:
+        with open(output_path, 'wb') as out:
+            out.writelines(heapq.merge(*files))
+    finally:
+        for f in files:
+            f.close()
+
+
+def reduceFanIn(spill_paths, fan_in, tmp_prefix):
+    """
+    spill文件多于fan_in时，先每fan_in个归并成一个中间文件，直到不超过fan_in个，使同时打开的文件数有上限
+    :param spill_paths: 有序的spill文件list
+    :param fan_in: 一次归并最多打开的文件个数
+    :param tmp_prefix: 中间文件路径的前缀
+    :return: 不超过fan_in个的有序文件list
+    """
+    merge_pass = 0
+    while len(spill_paths) > fan_in:
+        merged_paths = list()
+        for start in range(0, len(spill_paths), fan_in):
+            group = spill_paths[start:start + fan_in]
+            if len(group) == 1:
+                merged_paths.append(group[0])
+                continue
+            path = '%s-merge-%d-%d' % (tmp_prefix, merge_pass, len(merged_paths))
+            mergeRuns(group, path)
+            for spill_path in group:
+                os.remove(spill_path)
+            merged_paths.append(path)
+        spill_paths = merged_paths
+        merge_pass += 1
+    return spill_paths
+
+
+def runReduceTask(task):
+    """
+    在worker进程中运行一个reduce任务：归并该分区的所有spill文件，输入reducer
+    :param task: (spill文件list, reducer命令, 输出路径, 一次归并最多打开的文件个数)
+    """
+    spill_paths, reducer, output_path, fan_in = task
+    spill_paths = reduceFanIn(spill_paths, fan_in, output_path)
+    files = [open(path, 'rb') for path in spill_paths]
+    try:
+        with open(output_path, 'wb') as out:
+            proc = subprocess.Popen(shlex.split(reducer), stdin=subprocess.PIPE, stdout=out)
+            try:
+                for line in heapq.merge(*files):
+                    proc.stdin.write(line)
+            finally:
+                proc.stdin.close()
+            if proc.wait() != 0:
+                raise RuntimeError("%s exited with %d" % (reducer, proc.returncode))
+    finally:
+        for f in files:
+            f.close()
+
+
+def runJob(mapper, reducer, inputs, output, workers=None, reducers_num=None, combiner=None, memory='64MB',
+           split_size='64MB', tmp_dir=None, fan_in=128):
+    """
+    运行一个MapReduce job
+    :param mapper: mapper命令，例如'./mapper.py'
+    :param reducer: reducer命令，例如'./IterReducer.py 4'
+    :param inputs: 输入文件list
+    :param output: 输出文件，各reducer的输出按分区顺序拼接
+    :param workers: worker进程个数，默认为CPU个数
+    :param reducers_num: reducer个数，默认与workers相同
+    :param combiner: combiner命令，为None时不使用
+    :param memory: 每个map任务缓冲的内存上限，超过时spill到磁盘
+    :param split_size: 每个map任务的输入大小
+    :param tmp_dir: spill文件所在的目录，默认为系统临时目录
+    :param fan_in: 每个reducer一次归并最多打开的spill文件个数，超过时先多趟归并成中间文件
+    """
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2: %s" % fan_in)
+    workers = workers or multiprocessing.cpu_count()
+    reducers_num = reducers_num or workers
+    job_dir = tempfile.mkdtemp(prefix='mapreduce-', dir=tmp_dir)
+    try:
+        splits = splitInput(inputs, parseMemory(split_size))
+        map_tasks = [(index, split, mapper, combiner, reducers_num, parseMemory(memory), job_dir)
+                     for index, split in enumerate(splits)]
+        pool = multiprocessing.Pool(workers)
+        try:
+            map_results = pool.map(runMapTask, map_tasks, chunksize=1)
+            reduce_tasks = list()
+            for index in range(reducers_num):
+                spill_paths = [path for result in map_results for path in result[index]]
+                # 没有记录的分区不启动reducer，现有的reducer在空输入时会输出一行None
+                if spill_paths:
+                    part_path = os.path.join(job_dir, 'part-%05d' % index)
+                    reduce_tasks.append((spill_paths, reducer, part_path, fan_in))
+            pool.map(runReduceTask, reduce_tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        with open(output, 'wb') as out:
+            for _, _, part_path, _ in reduce_tasks:
+                with open(part_path, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="run streaming mapper/reducer scripts on local worker processes")
+    parser.add_argument('--mapper', required=True)
+    parser.add_argument('--reducer', required=True)
+    parser.add_argument('--combiner')
+    parser.add_argument('--input', action='append', required=True, help="input file, may be given several times")
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--workers', type=int, help="number of worker processes, defaults to the CPU count")
+    parser.add_argument('--reducers', type=int, help="number of reduce partitions, defaults to --workers")
+    parser.add_argument('--memory', default='64MB', help="map-side buffer per task before spilling to disk")
+    parser.add_argument('--split-size', default='64MB', help="input bytes per map task")
+    parser.add_argument('--tmp-dir', help="directory for spill files")
+    parser.add_argument('--fan-in', type=int, default=128, help="maximum spill files merged at once per reducer")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    runJob(args.mapper, args.reducer, args.input, args.output, args.workers, args.reducers, args.combiner,
+           args.memory, args.split_size, args.tmp_dir, args.fan_in)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+# input: "key rank out1 out2 ..."
+# rank为key的PageRank值，out为key的出链，上一次迭代IterReducer.py的输出，第一次由MergeReducer.py生成
+# output: "key L out1 out2 ..." 与 "out R val"
+# L记录沿用key的出链，使Reducer不需要再与links.txt合并；R记录为key分给out的PageRank值
+import sys
+
+for line in sys.stdin:
+    line = line.strip()
+    if len(line) <= 1:
+        continue
+    splits = line.split('\t')
+    key = splits[0]
+    rank = float(splits[1])
+    outPoints = splits[2:]
+    # MergeReducer.py对没有出链的结点输出None
+    if outPoints == ['None']:
+        outPoints = []
+    print('\t'.join([key, 'L'] + outPoints))
+    length = len(outPoints)
+    for outPoint in outPoints:
+        print("%s\tR\t%s" % (outPoint, str(rank / length)))
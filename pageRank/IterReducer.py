@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# input: "key L out1 out2 ..." 或 "key R val"
+# output: "key rank out1 out2 ..."，与IterMapper.py的输入格式相同，可以直接作为下一次迭代的输入
+# usage: IterReducer.py [N]，N为结点个数，默认与CalReducer.py相同
+import sys
+
+alpha = 0.8
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+
+def output(key, val, outPoints):
+    print('\t'.join([key, str(val * alpha + (1 - alpha) / N)] + outPoints))
+
+
+current_key = None
+current_val = 0.0
+current_outs = []
+for line in sys.stdin:
+    line = line.strip()
+    if len(line) <= 1:
+        continue
+    splits = line.split('\t')
+    key = splits[0]
+    if current_key and current_key != key:
+        output(current_key, current_val, current_outs)
+        current_val = 0.0
+        current_outs = []
+    current_key = key
+    if splits[1] == 'L':
+        current_outs = splits[2:]
+    else:
+        current_val += float(splits[2])
+if current_key:
+    output(current_key, current_val, current_outs)
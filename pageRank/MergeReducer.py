@@ -15,6 +15,9 @@ for line in sys.stdin:
     key, val = line.split('\t', 1)
     if current_key and current_key != key:
         print("%s\t%s\t%s" % (current_key, current_val1, current_val2))
+        # 没有出链的结点不能沿用上一个结点的出链
+        current_val1 = None
+        current_val2 = None
     current_key = key
     splits = val.split('\t', 1)
     m_type = splits[0]
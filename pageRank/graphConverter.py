@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# 将links.txt转换成二进制的CSR格式，之后的计算用np.load(mmap_mode='r')读取，不需要再解析文本
+# 按入链存储，三个数组就是转移矩阵M的CSR，pageRankEngine.py直接在映射的数组上相乘，不需要转置或复制
+# input: links.txt，"key 1 out1 out2 ..."
+# output: 目录，包括
+#   indptr.npy: 长度为N + 1，结点j的入链为indices[indptr[j]:indptr[j + 1]]
+#   indices.npy: 入链起点的index，重复的出链保留
+#   weights.npy: 每条入链分到的PageRank比例，即1 / 起点的出链个数
+#   nodes.txt: 第i行为结点i的key，结点按key排序，与pg_val.txt的顺序一致
+import argparse
+import array
+import os
+import numpy as np
+
+
+def readLinks(path):
+    """
+    逐行读取links.txt
+    :return: 生成(key, 出链key list)
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) <= 1:
+                continue
+            splits = line.split('\t')
+            yield splits[0], splits[2:]
+
+
+def indexDtype(nodes_num, edges_num):
+    """
+    scipy要求indptr与indices的类型相同，能用int32时用int32，否则为int64
+    """
+    if max(nodes_num, edges_num) < (1 << 31):
+        return np.int32
+    return np.int64
+
+
+def inLinks(sources, targets, nodes_num):
+    """
+    将边按(终点, 起点)排序成入链的CSR，与CalMapper.py相同，每条出链平分起点的PageRank
+    排序与边的输入顺序无关，links.txt与CSR目录两种输入的累加顺序相同，结果逐位相同
+    :param sources: 每条边起点的index(int64数组)
+    :param targets: 每条边终点的index(int64数组)
+    :param nodes_num: 结点个数
+    :return: indptr, indices, weights
+    """
+    dtype = indexDtype(nodes_num, len(targets))
+    out_degrees = np.bincount(sources, minlength=nodes_num)
+    order = np.lexsort((sources, targets))
+    indices = sources[order]
+    weights = 1.0 / out_degrees[indices]
+    indptr = np.zeros(nodes_num + 1, dtype=dtype)
+    np.cumsum(np.bincount(targets, minlength=nodes_num), out=indptr[1:])
+    return indptr, indices.astype(dtype), weights
+
+
+def convertLinks(links_path='links.txt', graph_dir='links_csr'):
+    """
+    扫描两遍links.txt：第一遍确定结点与index，第二遍记录边，再按终点排序成入链的CSR
+    :param links_path: links.txt路径
+    :param graph_dir: 输出目录
+    :return: 结点个数, 边个数
+    """
+    nodes = set()
+    for key, outs in readLinks(links_path):
+        nodes.add(key)
+        nodes.update(outs)
+    keys = sorted(nodes)
+    key2index = dict((key, index) for index, key in enumerate(keys))
+    # 用array而不是list保存边，每条边只占16字节
+    sources = array.array('q')
+    targets = array.array('q')
+    for key, outs in readLinks(links_path):
+        source = key2index[key]
+        for out in outs:
+            sources.append(source)
+            targets.append(key2index[out])
+    sources = np.frombuffer(sources, dtype=np.int64)
+    targets = np.frombuffer(targets, dtype=np.int64)
+    indptr, indices, weights = inLinks(sources, targets, len(keys))
+    if not os.path.exists(graph_dir):
+        os.makedirs(graph_dir)
+    np.save(os.path.join(graph_dir, 'indptr.npy'), indptr)
+    np.save(os.path.join(graph_dir, 'indices.npy'), indices)
+    np.save(os.path.join(graph_dir, 'weights.npy'), weights)
+    with open(os.path.join(graph_dir, 'nodes.txt'), 'w') as f:
+        for key in keys:
+            f.write("%s\n" % key)
+    return len(keys), len(indices)
+
+
+def loadGraph(graph_dir='links_csr'):
+    """
+    读取convertLinks的输出，三个数组以只读方式映射到内存，多个进程共享同一份页缓存
+    :param graph_dir: convertLinks的输出目录
+    :return: 结点key list, indptr, indices, weights
+    """
+    indptr = np.load(os.path.join(graph_dir, 'indptr.npy'), mmap_mode='r')
+    indices = np.load(os.path.join(graph_dir, 'indices.npy'), mmap_mode='r')
+    weights = np.load(os.path.join(graph_dir, 'weights.npy'), mmap_mode='r')
+    with open(os.path.join(graph_dir, 'nodes.txt'), 'r') as f:
+        keys = [line.rstrip('\n') for line in f]
+    return keys, indptr, indices, weights
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="convert links.txt to a binary in-link CSR graph")
+    parser.add_argument('--links', default='links.txt')
+    parser.add_argument('--output', default='links_csr', help="output directory")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    nodes_num, edges_num = convertLinks(args.links, args.output)
+    print("%d nodes, %d edges written to %s" % (nodes_num, edges_num, args.output))
+
+
+if __name__ == "__main__":
+    main()
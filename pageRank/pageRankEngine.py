@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# 在一个进程内计算PageRank：links.txt只读取一次，构造成scipy.sparse的CSR转移矩阵，用NumPy做幂迭代
+# 输入与输出格式与runPageRank相同
+# input: links.txt，"key 1 out1 out2 ..."，或graphConverter.py转换成的CSR目录
+# output: pg_val.txt，"key 0 val"，按key排序
+import argparse
+import os
+import time
+import numpy as np
+import scipy.sparse as sp
+import graphConverter
+
+# 与CalReducer.py相同的阻尼系数
+ALPHA = 0.8
+
+
+def loadLinks(path='links.txt'):
+    """
+    读取邻接表
+    :param path: links.txt路径，每行为"key\t1\tout1\tout2..."
+    :return: 结点key list(按key排序)，key-index dict，每个结点的出链index list
+    """
+    adjacency = dict()
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) <= 1:
+                continue
+            splits = line.split('\t')
+            adjacency.setdefault(splits[0], list()).extend(splits[2:])
+    # 只作为出链出现的结点也参与计算
+    nodes = set(adjacency)
+    for outs in adjacency.values():
+        nodes.update(outs)
+    # 与sort的输出顺序一致
+    keys = sorted(nodes)
+    key2index = dict((key, index) for index, key in enumerate(keys))
+    out_links = [[key2index[out] for out in adjacency.get(key, [])] for key in keys]
+    return keys, key2index, out_links
+
+
+def transitionMatrix(indptr, indices, weights):
+    """
+    由入链的CSR构造转移矩阵M，M[j, i]为结点i分给结点j的PageRank比例，相乘时重复的出链自然累加，没有出链的结点不分出PageRank
+    直接使用传入的数组，np.load(mmap_mode='r')得到的数组不会被复制
+    :param indptr: 结点j的入链为indices[indptr[j]:indptr[j + 1]]
+    :param indices: 入链起点的index
+    :param weights: 每条入链分到的PageRank比例
+    :return: N*N的稀疏矩阵
+    """
+    nodes_num = len(indptr) - 1
+    return sp.csr_matrix((weights, indices, indptr), shape=(nodes_num, nodes_num), copy=False)
+
+
+def buildTransitionMatrix(out_links):
+    """
+    由出链list构造转移矩阵，与graphConverter.py的输出相同，见transitionMatrix
+    :param out_links: 每个结点的出链index list
+    :return: N*N的稀疏矩阵
+    """
+    lengths = [len(outs) for outs in out_links]
+    sources = np.repeat(np.arange(len(out_links), dtype=np.int64), lengths)
+    targets = np.array([out for outs in out_links for out in outs], dtype=np.int64)
+    return transitionMatrix(*graphConverter.inLinks(sources, targets, len(out_links)))
+
+
+def loadRanks(path, key2index):
+    """
+    读取pg_val.txt作为迭代的初始值，文件中没有的结点初始值为0
+    :param path: pg_val.txt路径，每行为"key\t0\tval"
+    :param key2index: key-index dict
+    :return: PageRank数组
+    """
+    ranks = np.zeros(len(key2index))
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) <= 1:
+                continue
+            key, _, val = line.split('\t', 2)
+            if key in key2index:
+                ranks[key2index[key]] = float(val)
+    return ranks
+
+
+def powerIteration(matrix, ranks, alpha=ALPHA, iterations=40, tol=None, norm='l1', history=None):
+    """
+    幂迭代：r = alpha * M * r + (1 - alpha) / N，相邻两次的残差不超过tol时提前停止
+    :param matrix: 转移矩阵
+    :param ranks: 初始PageRank数组
+    :param alpha: 阻尼系数
+    :param iterations: 最多迭代次数
+    :param tol: 残差阈值，为None时总是迭代iterations次
+    :param norm: 用于判断收敛的残差，'l1'或'linf'
+    :param history: 传入list时，每次迭代追加一个{'iteration', 'l1', 'linf', 'elapsed'} dict
+    :return: PageRank数组
+    """
+    teleport = (1 - alpha) / matrix.shape[0]
+    for iteration in range(1, iterations + 1):
+        start = time.time()
+        new_ranks = alpha * matrix.dot(ranks) + teleport
+        diff = np.abs(new_ranks - ranks)
+        residual = {'l1': float(diff.sum()), 'linf': float(diff.max()) if len(diff) else 0.0}
+        ranks = new_ranks
+        if history is not None:
+            record = {'iteration': iteration, 'elapsed': time.time() - start}
+            record.update(residual)
+            history.append(record)
+        if tol is not None and residual[norm] <= tol:
+            break
+    return ranks
+
+
+def writeRanks(path, keys, ranks):
+    """
+    按pg_val.txt的格式写出，每行为"key\t0\tval"
+    :param path: 输出路径
+    :param keys: 结点key list，已按key排序
+    :param ranks: PageRank数组
+    """
+    with open(path, 'w') as f:
+        for key, val in zip(keys, ranks.tolist()):
+            f.write("%s\t%s\t%s\n" % (key, str(0), str(val)))
+
+
+def pageRank(links_path='links.txt', init_path=None, alpha=ALPHA, iterations=40, tol=None, norm='l1',
+             history=None, graph_dir=None):
+    """
+    :param links_path: links.txt路径，给出graph_dir时不使用
+    :param init_path: 初始PageRank文件，为None时每个结点的初始值为1 / N
+    :param alpha: 阻尼系数
+    :param iterations: 最多迭代次数
+    :param tol: 残差阈值，见powerIteration
+    :param norm: 'l1'或'linf'
+    :param history: 每次迭代的残差与耗时，见powerIteration
+    :param graph_dir: graphConverter.py的输出目录，不为None时直接映射二进制CSR，不解析links.txt，也不复制
+    :return: 结点key list，PageRank数组
+    """
+    if graph_dir is not None:
+        keys, indptr, indices, weights = graphConverter.loadGraph(graph_dir)
+        matrix = transitionMatrix(indptr, indices, weights)
+    else:
+        keys, _, out_links = loadLinks(links_path)
+        matrix = buildTransitionMatrix(out_links)
+    if init_path is not None and os.path.exists(init_path):
+        ranks = loadRanks(init_path, dict((key, index) for index, key in enumerate(keys)))
+    else:
+        ranks = np.full(len(keys), 1.0 / len(keys))
+    return keys, powerIteration(matrix, ranks, alpha, iterations, tol, norm, history)
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="in-process PageRank over links.txt")
+    parser.add_argument('--links', default='links.txt')
+    parser.add_argument('--graph', help="binary CSR directory written by graphConverter.py, used instead of --links")
+    parser.add_argument('--output', default='pg_val.txt')
+    parser.add_argument('--init', help="start from an existing pg_val.txt instead of 1/N")
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    parser.add_argument('--iterations', type=int, default=40, help="maximum number of iterations")
+    parser.add_argument('--tol', type=float, default=1e-8, help="stop when the residual is at most tol, <=0 disables")
+    parser.add_argument('--norm', choices=['l1', 'linf'], default='l1')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    history = list()
+    tol = args.tol if args.tol > 0 else None
+    keys, ranks = pageRank(args.links, args.init, args.alpha, args.iterations, tol, args.norm, history,
+                           args.graph)
+    writeRanks(args.output, keys, ranks)
+    print("iteration\tl1\tlinf\tms")
+    for record in history:
+        print("%d\t%s\t%s\t%d" % (record['iteration'], str(record['l1']), str(record['linf']),
+                                   record['elapsed'] * 1000))
+    if tol is not None and history and history[-1][args.norm] <= tol:
+        print("converged after %d iterations" % len(history))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# 比较相邻两次迭代的pg_val.txt，输出L1与L∞残差，并按阈值判断是否收敛
+# usage: residual.py old_pg_val.txt new_pg_val.txt [tol] [l1|linf]
+# output: "l1 linf"
+# 给出tol时，所选残差(默认l1)不超过tol则返回0，否则返回1，供runPageRank决定是否停止迭代
+import sys
+
+
+def loadRanks(path):
+    """
+    :param path: 每行为"key\t0\tval"
+    :return: key-PageRank dict
+    """
+    ranks = dict()
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) <= 1:
+                continue
+            key, _, val = line.split('\t', 2)
+            ranks[key] = float(val)
+    return ranks
+
+
+def computeResidual(old_ranks, new_ranks):
+    """
+    只在一边出现的结点按另一边为0计算
+    :return: L1残差, L∞残差
+    """
+    l1 = 0.0
+    linf = 0.0
+    for key in set(old_ranks) | set(new_ranks):
+        diff = abs(new_ranks.get(key, 0.0) - old_ranks.get(key, 0.0))
+        l1 += diff
+        linf = max(linf, diff)
+    return l1, linf
+
+
+if __name__ == "__main__":
+    l1, linf = computeResidual(loadRanks(sys.argv[1]), loadRanks(sys.argv[2]))
+    print("%s\t%s" % (str(l1), str(linf)))
+    if len(sys.argv) > 3:
+        norm = sys.argv[4] if len(sys.argv) > 4 else 'l1'
+        sys.exit(0 if {'l1': l1, 'linf': linf}[norm] <= float(sys.argv[3]) else 1)